@@ -1,3 +1,5 @@
+from .catalog import NPKCatalog
 from .file import File
 from .img import ColorBoard, IMGFactory, ImageFactory, ImageLink, Sprite
 from .npk import NPK
+from .frame_cache import FrameCache, default_frame_cache
@@ -0,0 +1,150 @@
+import json
+import os
+import typing
+from pathlib import Path
+
+from .file import File
+from .frame_cache import default_frame_cache
+from .npk import NPK
+
+
+class NPKCatalog:
+    """多个 npk 的 img 名称索引, 只读取文件头, 查找时才打开对应的 npk"""
+
+    def __init__(self):
+        # npk path -> (size, mtime_ns)
+        self._stats: dict[str, tuple[int, int]] = {}
+        # lower img name -> every (npk path, index) holding it, the first one in scan order wins.
+        self._entries: dict[str, list[tuple[str, int]]] = {}
+        self._opened: dict[str, NPK] = {}
+
+    @classmethod
+    def scan(cls, directory: os.PathLike, pattern='*.npk') -> 'NPKCatalog':
+        catalog = cls()
+        for path in sorted(Path(directory).glob(pattern)):
+            catalog.add(path)
+
+        return catalog
+
+    def add(self, path: os.PathLike) -> int:
+        """添加或重新读取一个 npk, 重新读取时保持它原来的顺序"""
+        path = str(path)
+        with open(path, 'rb') as fp:
+            npk = NPK.open(fp)
+            stat = os.fstat(fp.fileno())
+
+        self._forget(path)
+        self._stats[path] = (stat.st_size, stat.st_mtime_ns)
+        order = {p: i for i, p in enumerate(self._stats)}
+        for index, file in enumerate(npk.files):
+            candidates = self._entries.setdefault(file.name.lower(), [])
+            candidates.append((path, index))
+            if len(candidates) > 1:
+                # stable, so duplicates inside one npk keep their index order.
+                candidates.sort(key=lambda entry: order[entry[0]])
+
+        return len(npk.files)
+
+    def discard(self, path: os.PathLike):
+        path = str(path)
+        if self._stats.pop(path, None) is not None:
+            self._forget(path)
+
+    def _forget(self, path: str):
+        # drop the entries and open handle of a npk, names other npks still hold stay.
+        entries = {}
+        for name, candidates in self._entries.items():
+            candidates = [entry for entry in candidates if entry[0] != path]
+            if candidates:
+                entries[name] = candidates
+        self._entries = entries
+        npk = self._opened.pop(path, None)
+        if npk is not None:
+            npk.close()
+        default_frame_cache.discard(path)
+
+    def refresh(self) -> list[str]:
+        """重新读取大小或修改时间变化的 npk, 返回变化的路径"""
+        changed = []
+        for path, stat in list(self._stats.items()):
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                self.discard(path)
+                changed.append(path)
+                continue
+
+            if (st.st_size, st.st_mtime_ns) != stat:
+                self.add(path)
+                changed.append(path)
+
+        return changed
+
+    def locate(self, name: str) -> tuple[Path, int] | None:
+        candidates = self._entries.get(name.lower())
+        if candidates:
+            path, index = candidates[0]
+            return Path(path), index
+
+    def locate_all(self, name: str) -> list[tuple[Path, int]]:
+        """所有包含该 img 的 npk, 按扫描顺序"""
+        return [(Path(path), index) for path, index in self._entries.get(name.lower(), [])]
+
+    def open_file(self, name: str) -> File | None:
+        candidates = self._entries.get(name.lower())
+        if not candidates:
+            return None
+
+        path, index = candidates[0]
+        npk = self._opened.get(path)
+        if npk is None:
+            npk = self._opened[path] = NPK.open_mmap(path)
+
+        return npk.file_by_index(index)
+
+    def close(self):
+        for npk in self._opened.values():
+            npk.close()
+        self._opened = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, name: str):
+        return name.lower() in self._entries
+
+    @property
+    def paths(self) -> list[Path]:
+        return [Path(path) for path in self._stats]
+
+    def save(self, fp: typing.TextIO):
+        paths = list(self._stats)
+        path_ids = {path: i for i, path in enumerate(paths)}
+        json.dump({
+            'npks': [[path, *self._stats[path]] for path in paths],
+            'entries': {name: [[path_ids[path], index] for path, index in candidates]
+                        for name, candidates in self._entries.items()},
+        }, fp)
+
+    @classmethod
+    def load(cls, fp: typing.TextIO) -> 'NPKCatalog':
+        data = json.load(fp)
+
+        catalog = cls()
+        paths = []
+        for path, size, mtime_ns in data['npks']:
+            catalog._stats[path] = (size, mtime_ns)
+            paths.append(path)
+        for name, candidates in data['entries'].items():
+            if not isinstance(candidates[0], list):
+                # saved before every candidate was kept.
+                candidates = [candidates]
+            catalog._entries[name] = [(paths[path_id], index) for path_id, index in candidates]
+
+        return catalog
@@ -1,32 +1,117 @@
 import base64
+import dataclasses
 import io
 import os
+import threading
 import typing
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
 
-from pydoftools.npk import IMGFactory, NPK
+import anyio
+from loguru import logger
 
+from pydoftools.npk import IMGFactory, ImageLink, NPK
 
-def extra_images(npk: NPK, out: os.PathLike):
+if typing.TYPE_CHECKING:
+    from pydoftools.npk.img.image import Image
+    from pydoftools.npk.img.version.img import IMG
+
+
+def fake_tqdm(g: typing.Iterable, **kwargs):
+    return g
+
+
+# md5 of the img data, written after all of its pngs.
+IMG_STAMP = '.md5'
+
+
+def extra_images(npk: NPK,
+                 out: os.PathLike,
+                 workers: int | None = 1,
+                 force=False,
+                 use_tqdm=False) -> int:
+    """导出 npk 中所有贴图为 png, 返回导出的图片数量.
+
+    workers 为 None 时使用全部 cpu, 已导出且 img 未变化的目录会被跳过.
+    """
     out = Path(out)
     if not out.exists():
         out.mkdir(parents=True)
 
+    tqdm = fake_tqdm
+    if use_tqdm:
+        try:
+            from tqdm import tqdm
+        except ImportError:
+            logger.warning('tqdm not found, use_tqdm will be ignored.')
+
+    workers = workers or os.cpu_count() or 1
+    tasks = _extra_images_tasks(npk, out, force)
+    total = 0
+    if workers == 1:
+        for n in tqdm((_extra_img(*task) for task in tasks), total=len(npk.files)):
+            total += n
+    else:
+        with ProcessPoolExecutor(workers) as executor:
+            # bound the img data waiting in the pool.
+            results = _ordered_map(executor, _extra_img, tasks, workers * 2)
+            for n in tqdm(results, total=len(npk.files)):
+                total += n
+
+    return total
+
+
+def _extra_images_tasks(npk: NPK, out: Path, force: bool):
     for file in npk.files:
         dirpath = out / file.name
-        if not dirpath.exists():
-            dirpath.mkdir(parents=True)
+        md5 = file.md5
+        if not force and _read_stamp(dirpath) == md5:
+            yield None, None, None
+            continue
 
-        img = IMGFactory.open(io.BytesIO(file.data))
-        for i, _img in enumerate(img.images):
-            pil_image = img.build(_img)
-            with (dirpath / f'{i}.png').open('wb') as fp:
-                pil_image.save(fp)
+        yield bytes(file.data), str(dirpath), md5
+
+
+def _read_stamp(dirpath: Path) -> str | None:
+    try:
+        return (dirpath / IMG_STAMP).read_text()
+    except OSError:
+        return None
+
+
+def _extra_img(data: bytes | None, dirpath: str | None, md5: str | None) -> int:
+    if data is None:
+        return 0
+
+    dirpath = Path(dirpath)
+    if not dirpath.exists():
+        dirpath.mkdir(parents=True)
+
+    img = IMGFactory.open(io.BytesIO(data))
+    for i, _img in enumerate(img.images):
+        pil_image = img.build(_img)
+        with (dirpath / f'{i}.png').open('wb') as fp:
+            pil_image.save(fp)
+
+    (dirpath / IMG_STAMP).write_text(md5)
+    return len(img.images)
+
+
+def _ordered_map(executor: Executor, fn: typing.Callable, iterable: typing.Iterable, window: int):
+    futures = deque()
+    for args in iterable:
+        futures.append(executor.submit(fn, *args))
+        if len(futures) >= window:
+            yield futures.popleft().result()
+
+    while futures:
+        yield futures.popleft().result()
 
 
 def extra_base64(npk: NPK) -> typing.Generator[str, None, None]:
     for file in npk.files:
-        img = IMGFactory.open(io.BytesIO(file.data))
+        img = file.to_img()
         for i, _img in enumerate(img.images):
             pil_img = img.build(_img)
             with io.BytesIO() as buf:
@@ -34,3 +119,70 @@ def extra_base64(npk: NPK) -> typing.Generator[str, None, None]:
                 b = buf.getvalue()
 
             yield base64.b64encode(b).decode()
+
+
+@dataclasses.dataclass
+class ExtractedImage:
+    """导出的单张贴图, data 为 png 字节或其 base64 字符串"""
+    name: str
+    index: int
+    x: int
+    y: int
+    w: int
+    h: int
+    mw: int
+    mh: int
+    data: bytes | str
+
+
+async def aextra_base64(npk: NPK,
+                        workers: int = 4,
+                        buffer_size: int = 16,
+                        raw=False) -> typing.AsyncGenerator[ExtractedImage, None]:
+    """按顺序异步产出贴图, 解码和 png 编码在线程池中进行.
+
+    最多 buffer_size 张贴图同时在处理, 消费方处理不过来时不再提交新的解码.
+    raw 为 True 时 data 为 png 字节, 否则为 base64 字符串.
+    """
+    executor = ThreadPoolExecutor(workers)
+    pending = deque()
+    try:
+        for file in npk.files:
+            # reading file data from the npk and parsing the header block, keep it off the event loop.
+            # one img is opened at a time, so the npk io is never shared between threads.
+            img = await anyio.to_thread.run_sync(file.to_img)
+            # images of one img share its io.
+            lock = threading.Lock()
+            for i, image in enumerate(img.images):
+                pending.append(executor.submit(_render_png, file.name, i, img, image, lock, raw))
+                if len(pending) >= buffer_size:
+                    yield await anyio.to_thread.run_sync(pending.popleft().result)
+
+        while pending:
+            yield await anyio.to_thread.run_sync(pending.popleft().result)
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _render_png(name: str,
+                index: int,
+                img: 'IMG',
+                image: 'Image | ImageLink',
+                lock: threading.Lock,
+                raw: bool) -> ExtractedImage:
+    with lock:
+        img.load_all()
+
+    pil_img = img.build(image)
+    with io.BytesIO() as buf:
+        pil_img.save(buf, format='png')
+        data = buf.getvalue()
+
+    if not raw:
+        data = base64.b64encode(data).decode()
+
+    if isinstance(image, ImageLink):
+        image = image.final_image
+
+    return ExtractedImage(name=name, index=index, x=image.x, y=image.y, w=image.w, h=image.h,
+                          mw=image.mw, mh=image.mh, data=data)
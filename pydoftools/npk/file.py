@@ -3,7 +3,7 @@ import io
 import typing
 
 from .consts import NPK_FILENAME_DECORD_FLAG
-from ..utils.io import read_range, read_struct, write_struct
+from ..utils.io import MemoryIO, read_range, read_struct, write_struct
 from ..utils.zlib import zfill_bytes
 
 if typing.TYPE_CHECKING:
@@ -17,6 +17,7 @@ class File:
         self._offset = 0
         self._size = 0
         self._data = data
+        self._img: 'IMG | None' = None
 
     def set_io_info(self, offset: int, io=None):
         self._offset = offset
@@ -33,6 +34,7 @@ class File:
     def set_data(self, data):
         self._data = data
         self._size = len(data)
+        self._img = None
 
     @classmethod
     def open(cls, io: typing.IO) -> 'File':
@@ -78,6 +80,7 @@ class File:
     def load(self, force=False) -> bool:
         if self._io and (force or not self.is_loaded):
             self._data = read_range(self._io, self._offset, self._size)
+            self._img = None
             return True
 
         return False
@@ -105,6 +108,16 @@ class File:
         result = bytes(result_list)
         return result
 
-    def to_img(self) -> 'IMG':
+    def open_img(self) -> 'IMG':
+        """以 lazy 模式打开并保留 img, 重复调用返回同一个对象"""
+        if self._img is None:
+            self._img = self.to_img(lazy=True)
+        return self._img
+
+    def to_img(self, lazy=False) -> 'IMG':
         from . import IMGFactory
-        return IMGFactory.open(io.BytesIO(self.data))
+        data = self.data
+        if isinstance(data, memoryview):
+            # keep image payloads as slices of the mapped npk.
+            return IMGFactory.open(MemoryIO(data), lazy)
+        return IMGFactory.open(io.BytesIO(data), lazy)
@@ -0,0 +1,84 @@
+import threading
+import typing
+from collections import OrderedDict
+
+from PIL.Image import Image as PILImage
+
+# npk path, img name, frame index, color board index
+FrameKey = tuple[str, str, int, int | None]
+
+
+class FrameCacheInfo(typing.NamedTuple):
+    hits: int
+    misses: int
+    evictions: int
+    max_bytes: int
+    currbytes: int
+    currsize: int
+
+
+class FrameCache:
+    """进程内共享的已解码贴图缓存, 按像素字节数限制大小, LRU 淘汰.
+
+    返回的 PIL 图片被所有调用方共享, 需要修改时先 copy.
+    """
+
+    def __init__(self, max_mb: float = 256):
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.data: OrderedDict[FrameKey, PILImage] = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def sizeof(image: PILImage) -> int:
+        return image.width * image.height * len(image.getbands())
+
+    def get(self, key: FrameKey) -> PILImage | None:
+        with self._lock:
+            image = self.data.get(key)
+            if image is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.data.move_to_end(key)
+            return image
+
+    def put(self, key: FrameKey, image: PILImage):
+        size = self.sizeof(image)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self.data.pop(key, None)
+            if old is not None:
+                self.size -= self.sizeof(old)
+            self.data[key] = image
+            self.size += size
+            while self.size > self.max_bytes:
+                _, evicted = self.data.popitem(last=False)
+                self.size -= self.sizeof(evicted)
+                self.evictions += 1
+
+    def discard(self, npk_path: str):
+        """移除一个 npk 的所有贴图, 用于 npk 文件变化后"""
+        with self._lock:
+            for key in [key for key in self.data if key[0] == npk_path]:
+                self.size -= self.sizeof(self.data.pop(key))
+
+    def cache_info(self) -> FrameCacheInfo:
+        return FrameCacheInfo(self.hits, self.misses, self.evictions, self.max_bytes, self.size, len(self.data))
+
+    def clear(self):
+        with self._lock:
+            self.data.clear()
+            self.size = 0
+            self.hits = self.misses = self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+
+# used by NPK.build_frame unless another cache is given.
+default_frame_cache = FrameCache()
@@ -1,14 +1,17 @@
 import typing
 
 from pydoftools.utils.io import read_struct, write_struct
+from .format.color import Color
 
 
 class ColorBoard:
     def __init__(self):
         self._colors: list[tuple[int]] = []
+        self._tables: tuple[bytes, bytes, bytes, bytes] | None = None
 
     def add_color(self, color: tuple[int]):
         self._colors.append(color)
+        self._tables = None
 
     @classmethod
     def open(cls, io: typing.IO) -> 'ColorBoard':
@@ -31,3 +34,9 @@ class ColorBoard:
     @property
     def colors(self) -> list[tuple[int]]:
         return self._colors
+
+    @property
+    def tables(self) -> tuple[bytes, bytes, bytes, bytes]:
+        if self._tables is None:
+            self._tables = Color.palette_tables(self._colors)
+        return self._tables
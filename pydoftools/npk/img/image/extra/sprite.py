@@ -6,6 +6,8 @@ from ..image import Image
 
 
 class SpriteZlibImage(Image):
+    # w, h, size, x, y, mw, mh, keep, sprite_index, left, top, right, bottom, rotate
+    HEADER_INTS = 14
 
     def __init__(self, fmt: int):
         super().__init__(fmt)
@@ -22,9 +24,12 @@ class SpriteZlibImage(Image):
         self.rotate = 0
 
     def open(self, io: typing.IO, **kwargs) -> 'SpriteZlibImage':
-        super().open(io)
+        return self.set_header(read_struct(io, f'<{self.HEADER_INTS}i'))
 
-        keep, sprite_index, lx, ly, rx, ry, rotate = read_struct(io, '<7i')
+    def set_header(self, values: typing.Sequence[int], fix_size=False) -> 'SpriteZlibImage':
+        super().set_header(values)
+
+        keep, sprite_index, lx, ly, rx, ry, rotate = values[7:14]
 
         self.keep = keep
         self.sprite_index = sprite_index
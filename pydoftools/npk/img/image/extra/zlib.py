@@ -14,10 +14,15 @@ class ZlibImage(Image):
 
         self._zip_data: bytes | None = None
 
-    def load(self, force=False):
-        super().load(force)
-        self._zip_data = self._data
-        self._data = zlib_decompress(self._zip_data)
+    def _finish_load(self, data: bytes):
+        self._zip_data = data
+        # size_fix is only a guess for dxt formats, use it to preallocate but do not enforce it.
+        self._data = zlib_decompress(data, self.size_fix)
+
+    def unload(self):
+        if self._io:
+            super().unload()
+            self._zip_data = None
 
     def compress(self):
         data = zlib.compress(self.data)
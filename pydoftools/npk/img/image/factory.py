@@ -1,4 +1,5 @@
 import typing
+from array import array
 
 from pydoftools.npk.consts import *
 from pydoftools.utils.io import read_struct
@@ -34,3 +35,38 @@ class ImageFactory:
         else:
             extra, = read_struct(io, '<i')
             return ImageFactory.instance(fmt, extra).open(io, **kwargs)
+
+    @classmethod
+    def scan(cls, header: array, count: int) -> array:
+        """在 int32 形式的图片头表中找出每张图片头的起始位置"""
+        positions = array('I')
+        pos = 0
+        for _ in range(count):
+            positions.append(pos)
+            fmt = header[pos]
+            if fmt not in IMAGE_FORMATS_ALL:
+                raise ImageFormatException(fmt)
+
+            if fmt == IMAGE_FORMAT_LINK:
+                # format, index
+                pos += 2
+            else:
+                _cls = cls.cls_extra_map.get(header[pos + 1])
+                if _cls is None:
+                    raise ImageExtraException(header[pos + 1])
+                # format, extra, header values
+                pos += 2 + _cls.HEADER_INTS
+
+        if pos > len(header):
+            raise ValueError(f'Image header table too short: {len(header)} < {pos}')
+        return positions
+
+    @classmethod
+    def from_header(cls, header: array, pos: int, images: list, **kwargs) -> Image | ImageLink:
+        """由图片头表中 pos 处的记录创建图片"""
+        fmt = header[pos]
+        if fmt == IMAGE_FORMAT_LINK:
+            return ImageLink(images, header[pos + 1])
+
+        image = cls.instance(fmt, header[pos + 1])
+        return image.set_header(header[pos + 2:pos + 2 + image.HEADER_INTS], **kwargs)
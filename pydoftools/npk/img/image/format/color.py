@@ -39,3 +39,129 @@ class Color:
         v2 = a | r >> 4
 
         return v1, v2
+
+    @staticmethod
+    def from_1555_bulk(data: bytes) -> bytes:
+        count = len(data) // 2
+        data = data[:count * 2]
+        v1s = bytes(data[0::2])
+        v2s = bytes(data[1::2])
+
+        # g takes bits from both bytes, but they never overlap.
+        g = _or_bytes(count, v1s.translate(_1555_G1), v2s.translate(_1555_G2))
+
+        return _interleave(count,
+                           v2s.translate(_1555_R),
+                           g,
+                           v1s.translate(_1555_B),
+                           v2s.translate(_1555_A))
+
+    @staticmethod
+    def from_4444_bulk(data: bytes) -> bytes:
+        count = len(data) // 2
+        data = data[:count * 2]
+        v1s = bytes(data[0::2])
+        v2s = bytes(data[1::2])
+
+        return _interleave(count,
+                           v2s.translate(_4444_LOW),
+                           v1s.translate(_4444_HIGH),
+                           v1s.translate(_4444_LOW),
+                           v2s.translate(_4444_HIGH))
+
+    @staticmethod
+    def from_8888_bulk(data: bytes) -> bytes:
+        count = len(data) // 4
+        data = data[:count * 4]
+        raw = bytearray(data)
+        # bgra -> rgba
+        raw[0::4] = data[2::4]
+        raw[2::4] = data[0::4]
+
+        return bytes(raw)
+
+    @staticmethod
+    def palette_tables(colors: list[tuple[int]]) -> tuple[bytes, bytes, bytes, bytes]:
+        # index -> channel translate tables, unknown indexes map to 0.
+        colors = list(colors[:256]) + [(0, 0, 0, 0)] * (256 - len(colors))
+        return tuple(bytes(color[c] for color in colors) for c in range(4))
+
+    @staticmethod
+    def from_indexes_bulk(data: bytes, tables: tuple[bytes, bytes, bytes, bytes]) -> bytes:
+        data = bytes(data)
+        return _interleave(len(data), *(data.translate(table) for table in tables))
+
+    @staticmethod
+    def to_1555_bulk(data: bytes) -> bytes:
+        count = len(data) // 4
+        r, g, b, a = _split(data, count)
+
+        v1 = _or_bytes(count, g.translate(_TO_1555_V1_G), b.translate(_TO_1555_V1_B))
+        v2 = _or_bytes(count, a.translate(_TO_1555_V2_A), r.translate(_TO_1555_V2_R),
+                       g.translate(_TO_1555_V2_G))
+
+        return _interleave2(count, v1, v2)
+
+    @staticmethod
+    def to_4444_bulk(data: bytes) -> bytes:
+        count = len(data) // 4
+        r, g, b, a = _split(data, count)
+
+        v1 = _or_bytes(count, g, b.translate(_TO_4444_SHIFT))
+        v2 = _or_bytes(count, a, r.translate(_TO_4444_SHIFT))
+
+        return _interleave2(count, v1, v2)
+
+    @staticmethod
+    def to_8888_bulk(data: bytes) -> bytes:
+        # rgba -> bgra is the same swap.
+        return Color.from_8888_bulk(data)
+
+
+def _split(data: bytes, count: int) -> tuple[bytes, bytes, bytes, bytes]:
+    data = data[:count * 4]
+    return bytes(data[0::4]), bytes(data[1::4]), bytes(data[2::4]), bytes(data[3::4])
+
+
+def _or_bytes(count: int, *channels: bytes) -> bytes:
+    value = 0
+    for channel in channels:
+        value |= int.from_bytes(channel, 'little')
+
+    return value.to_bytes(count, 'little')
+
+
+def _interleave2(count: int, v1: bytes, v2: bytes) -> bytes:
+    data = bytearray(count * 2)
+    data[0::2] = v1
+    data[1::2] = v2
+
+    return bytes(data)
+
+
+def _interleave(count: int, r: bytes, g: bytes, b: bytes, a: bytes) -> bytes:
+    raw = bytearray(count * 4)
+    raw[0::4] = r
+    raw[1::4] = g
+    raw[2::4] = b
+    raw[3::4] = a
+
+    return bytes(raw)
+
+
+# byte -> channel translate tables.
+_1555_R = bytes(Color.from_1555(0, i)[0] for i in range(256))
+_1555_G1 = bytes(Color.from_1555(i, 0)[1] for i in range(256))
+_1555_G2 = bytes(Color.from_1555(0, i)[1] for i in range(256))
+_1555_B = bytes(Color.from_1555(i, 0)[2] for i in range(256))
+_1555_A = bytes(Color.from_1555(0, i)[3] for i in range(256))
+_4444_LOW = bytes(Color.from_4444(0, i)[0] for i in range(256))
+_4444_HIGH = bytes(Color.from_4444(0, i)[3] for i in range(256))
+
+# channel -> byte translate tables.
+_TO_1555_V1_G = bytes(Color.to_1555(0, i, 0, 0)[0] for i in range(256))
+_TO_1555_V1_B = bytes(Color.to_1555(0, 0, i, 0)[0] for i in range(256))
+_TO_1555_V2_R = bytes(Color.to_1555(i, 0, 0, 0)[1] for i in range(256))
+_TO_1555_V2_G = bytes(Color.to_1555(0, i, 0, 0)[1] for i in range(256))
+_TO_1555_V2_A = bytes(Color.to_1555(0, 0, 0, i)[1] for i in range(256))
+_TO_4444_SHIFT = bytes(i >> 4 for i in range(256))
@@ -1,22 +1,21 @@
-from io import BytesIO
+import typing
 
-from pydoftools.utils.io import read_range, read_struct, write_struct
+from .color import Color
 from .factory import FormatFactory
 
+if typing.TYPE_CHECKING:
+    from ..color_board import ColorBoard
+
 
 class FormatConvertor:
     @staticmethod
-    def to_raw_indexes(data, colors):
-        with BytesIO(data) as io_indexes:
-            with BytesIO() as io_raw:
-                temp = read_struct(io_indexes, '<B', False)
-                while temp is not None:
-                    [index] = temp
-                    write_struct(io_raw, '<4B', *colors[index])
-                    temp = read_struct(io_indexes, '<B', False)
-                data_raw = read_range(io_raw)
-
-        return data_raw
+    def to_raw_indexes(data, colors: 'ColorBoard | list[tuple[int]]'):
+        if isinstance(colors, list):
+            tables = Color.palette_tables(colors)
+        else:
+            tables = colors.tables
+
+        return Color.from_indexes_bulk(data, tables)
 
     @staticmethod
     def to_raw(data, image_format):
@@ -32,3 +31,8 @@ class FormatConvertor:
     def from_image(image, image_format):
         fmt = FormatFactory.instance(image_format)
         return fmt.from_image(image)
+
+    @staticmethod
+    def from_raw(data, image_format):
+        fmt = FormatFactory.instance(image_format)
+        return fmt.from_raw(data)
@@ -9,6 +9,9 @@ from .format import FormatConvertor
 
 
 class Image:
+    # int32 values behind format and extra in the image header.
+    HEADER_INTS = 7
+
     def __init__(self, fmt: int):
         self._io = None
         self._data = None
@@ -29,7 +32,10 @@ class Image:
         self._io = io
 
     def open(self, io: typing.IO, fix_size=False, **kwargs) -> 'Image':
-        w, h, size, x, y, mw, mh = read_struct(io, '<7i')
+        return self.set_header(read_struct(io, f'<{self.HEADER_INTS}i'), fix_size)
+
+    def set_header(self, values: typing.Sequence[int], fix_size=False) -> 'Image':
+        w, h, size, x, y, mw, mh = values[:7]
         self.w = w
         self.h = h
         self._size = size
@@ -52,14 +58,29 @@ class Image:
         return self.w * self.h * PIX_SIZE[self.format]
 
     def load(self, force=False):
-        if self._io and (force or not self.is_loaded):
-            self._data = read_range(self._io, self._offset, self._size)
+        if self._needs_load(force):
+            self._finish_load(self._read_data())
+
+    def _needs_load(self, force=False) -> bool:
+        return bool(self._io) and (force or not self.is_loaded)
+
+    def _read_data(self) -> bytes:
+        return read_range(self._io, self._offset, self._size)
+
+    def _finish_load(self, data: bytes):
+        # no io access, may run on another thread.
+        self._data = data
 
     def save(self, io: typing.IO):
         # format, extra, w, h, size, x, y, mw, mh
         write_struct(io, '<9i', self.format, self.extra, self.w, self.h,
                      self.size, self.x, self.y, self.mw, self.mh)
 
+    def unload(self):
+        """释放已读取的数据, 下次访问时重新从 io 读取"""
+        if self._io:
+            self._data = None
+
     @property
     def is_loaded(self) -> bool:
         return self._data is not None
@@ -78,13 +99,16 @@ class Image:
         if self.extra not in [IMAGE_EXTRA_NONE, IMAGE_EXTRA_ZLIB]:
             raise ImageExtraException(self.extra)
 
-        self.set_data(FormatConvertor.from_image(image, self.format))
+        data, w, h = FormatConvertor.from_image(image, self.format)
+        self.w = w
+        self.h = h
+        self.set_data(data)
 
     def convert(self, image_format: int):
         if self.extra not in [IMAGE_EXTRA_NONE, IMAGE_EXTRA_ZLIB]:
             raise ImageExtraException(self.extra)
 
         raw_data = FormatConvertor.to_raw(self.data, self.format)
-        image = image_util.load_raw(raw_data, self.w, self.h)
-        data, w, h = FormatConvertor.from_image(image, image_format)
-        self._data = data
+        data = FormatConvertor.from_raw(raw_data, image_format)
+        self.format = image_format
+        self.set_data(data)
@@ -1,6 +1,8 @@
 import typing
 import zlib
 
+from loguru import logger
+
 from pydoftools.npk.consts import IMAGE_FORMATS_DDS
 from pydoftools.utils import image as image_util
 from pydoftools.utils.io import read_range, read_struct, write_struct
@@ -14,6 +16,8 @@ class Sprite:
         self._offset = 0
         self._data: bytes | None = None
         self._zip_data: bytes | None = None
+        # decoded rgba atlas, filled by build(cache=True).
+        self._raw: bytes | None = None
 
         self.keep = 0
         self.format = 0
@@ -43,9 +47,31 @@ class Sprite:
         return sprite
 
     def load(self, force=False):
-        if self._io and (force or not self.is_loaded):
-            self._zip_data = read_range(self._io, self._offset, self.data_size)
-            self._data = zlib_decompress(self._zip_data)
+        if self._needs_load(force):
+            self._finish_load(self._read_data())
+
+    def _needs_load(self, force=False) -> bool:
+        return bool(self._io) and (force or not self.is_loaded)
+
+    def _read_data(self) -> bytes:
+        return read_range(self._io, self._offset, self.data_size)
+
+    def _finish_load(self, data: bytes):
+        # no io access, may run on another thread.
+        self._zip_data = data
+        self._data = zlib_decompress(data, self.raw_size)
+        if self.raw_size and len(self._data) != self.raw_size:
+            # not enforced until checked against real atlases.
+            logger.warning('Sprite {} decompressed to {} bytes, header says {}',
+                           self.index, len(self._data), self.raw_size)
+        self._raw = None
+
+    def unload(self):
+        """释放解压后的数据和 rgba 缓存, 下次访问时重新从 io 读取"""
+        if self._io:
+            self._data = None
+            self._zip_data = None
+            self._raw = None
 
     def save(self, io: typing.IO):
         self.compress()
@@ -67,6 +93,7 @@ class Sprite:
         self._data = data
         self.data_size = 0
         self._zip_data = None
+        self._raw = None
 
     def compress(self):
         data = self.data
@@ -83,7 +110,22 @@ class Sprite:
             self.compress()
         return self._zip_data
 
-    def build(self, box: tuple[int, int, int, int] = None, rotate=0) -> image_util.Image:
+    @property
+    def raw(self) -> bytes:
+        if self._raw is None:
+            if self.format in IMAGE_FORMATS_DDS:
+                self._raw = image_util.load_dds(self.data).convert('RGBA').tobytes()
+            else:
+                self._raw = FormatConvertor.to_raw(self.data, self.format)
+        return self._raw
+
+    def clear_raw(self):
+        self._raw = None
+
+    def build(self, box: tuple[int, int, int, int] = None, rotate=0, cache=False) -> image_util.Image:
+        if cache:
+            return self._build_cached(box, rotate)
+
         data = self.data
 
         if self.format in IMAGE_FORMATS_DDS:
@@ -99,3 +141,15 @@ class Sprite:
             image = image_util.load_raw(data, w, h, rotate)
 
         return image
+
+    def _build_cached(self, box: tuple[int, int, int, int] = None, rotate=0) -> image_util.Image:
+        data = self.raw
+
+        if box:
+            data = image_util.crop_raw(data, self.w, box)
+            [l, t, r, b] = box
+            w, h = r - l, b - t
+        else:
+            w, h = self.w, self.h
+
+        return image_util.load_raw(data, w, h, rotate)
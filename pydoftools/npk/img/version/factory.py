@@ -36,7 +36,8 @@ class IMGFactory:
         return _cls()
 
     @classmethod
-    def open(cls, io: typing.IO) -> 'IMG':
+    def open(cls, io: typing.IO, lazy=False) -> 'IMG':
+        """lazy 为 True 时一次读入图片头表, 图片在访问时才创建 (v1 不支持, 忽略)"""
         magic = read_ascii_string(io, 18)
         if magic not in [IMG_MAGIC, IMG_MAGIC_OLD]:
             raise NotIMGFileException
@@ -53,6 +54,6 @@ class IMGFactory:
         keep, version = read_struct(io, '<2i')
 
         img = IMGFactory.instance(version)
-        img.open(io, version, images_size, keep)
+        img.open(io, version, images_size, keep, lazy)
 
         return img
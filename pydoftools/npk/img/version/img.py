@@ -1,12 +1,62 @@
 import typing
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
 from PIL.Image import Image as PILImage
 
 from pydoftools.utils.image import load_raw
 from pydoftools.utils.io import read_struct, write_struct
-from ..image import (FormatConvertor, Image, ImageLink, SpriteZlibImage,
+from ..image import (FormatConvertor, Image, ImageLink, Sprite, SpriteZlibImage,
                      ZlibImage)
 
+# compressed bytes handed to one worker task by load_parallel.
+LOAD_BATCH_SIZE = 256 << 10
+
+
+def load_parallel(items: typing.Iterable[Image | Sprite], force=False, workers=4, max_mb: float = 64) -> int:
+    """读取在调用线程中顺序进行, 解压在线程池中进行, 返回加载的数量.
+
+    在途 (已读取未解压完) 的数据不超过 max_mb.
+    """
+    max_bytes = max_mb * 1024 * 1024
+    batch_bytes = min(LOAD_BATCH_SIZE, max_bytes)
+    count = 0
+    with ThreadPoolExecutor(workers) as executor:
+        pending = deque()
+        in_flight = 0
+        batch, size = [], 0
+        for item in items:
+            if not item._needs_load(force):
+                continue
+
+            data = item._read_data()
+            batch.append((item, data))
+            size += len(data)
+            count += 1
+            # small images are handed over in batches, one task each costs more than the decompression.
+            if size < batch_bytes:
+                continue
+
+            pending.append((executor.submit(_finish_batch, batch), size))
+            in_flight += size
+            batch, size = [], 0
+            while in_flight > max_bytes:
+                future, done = pending.popleft()
+                future.result()
+                in_flight -= done
+
+        if batch:
+            pending.append((executor.submit(_finish_batch, batch), size))
+        for future, _ in pending:
+            future.result()
+
+    return count
+
+
+def _finish_batch(batch: list[tuple[Image | Sprite, bytes]]):
+    for item, data in batch:
+        item._finish_load(data)
+
 
 class IMG:
     def __init__(self):
@@ -14,11 +64,15 @@ class IMG:
         self._keep = 0
         self._version = 0
         self._images: list[Image | ImageLink] = []
+        # lazy mode only reads the header table, images are created on access.
+        self._lazy = False
+        self._pending = 0
 
-    def open(self, io: typing.IO, version: int, images_size: int, keep: int):
+    def open(self, io: typing.IO, version: int, images_size: int, keep: int, lazy=False):
         self._io = io
         self._version = version
         self._keep = keep
+        self._lazy = lazy
 
         image_count, = read_struct(io, '<i')
 
@@ -35,9 +89,18 @@ class IMG:
     def _callback_after_images_open(self, images_size: int):
         pass
 
-    def load_all(self, force=False):
-        for image in self._images:
-            image.load(force)
+    def load_all(self, force=False, workers=1, max_mb: float = 64):
+        """workers 大于 1 时在线程池中解压, max_mb 为在途数据的上限"""
+        if workers > 1:
+            load_parallel(self.loadables(), force, workers, max_mb)
+            return
+
+        for item in self.loadables():
+            item.load(force)
+
+    def loadables(self) -> list[Image | Sprite]:
+        """load_all 会加载的对象"""
+        return [image for image in self.images if not isinstance(image, ImageLink)]
 
     @property
     def version(self) -> int:
@@ -45,13 +108,19 @@ class IMG:
 
     @property
     def images(self) -> list[Image | ImageLink]:
+        if self._pending:
+            for i in range(len(self._images)):
+                self._open_image(i)
         return self._images
 
+    def _open_image(self, index: int) -> Image | ImageLink:
+        return self._images[index]
+
     def save(self, io: typing.IO):
         io.truncate()
         self._callback_before_save(io)
         # keep, version, img_count
-        write_struct(io, '<3i', self._keep, self._version, len(self._images))
+        write_struct(io, '<3i', self._keep, self._version, len(self.images))
         self._callback_before_images_save(io)
         self._callback_images_save(io)
         self._callback_after_images_save(io)
@@ -71,7 +140,7 @@ class IMG:
     @property
     def images_header_size(self) -> int:
         size = 0
-        for image in self._images:
+        for image in self.images:
             # format
             size += 4
             if isinstance(image, ImageLink):
@@ -86,7 +155,7 @@ class IMG:
     @property
     def images_data_size(self) -> int:
         size = 0
-        for image in self._images:
+        for image in self.images:
             if isinstance(image, (ImageLink, SpriteZlibImage)):
                 continue
             elif isinstance(image, ZlibImage):
@@ -114,11 +183,21 @@ class IMG:
     def _common_size(self) -> int:
         return 0
 
-    def build(self, image: Image | ImageLink, **kwargs) -> PILImage:
+    def build(self, image: Image | ImageLink, drop_data=False, **kwargs) -> PILImage:
+        """drop_data 为 True 时构建后释放这一帧自己的解压数据, 共享的 sprite 由 unload_all 释放"""
         if isinstance(image, ImageLink):
-            return self.build(image.final_image, **kwargs)
+            return self.build(image.final_image, drop_data=drop_data, **kwargs)
+
+        result = self._build(image, **kwargs)
+        if drop_data:
+            image.unload()
+
+        return result
 
-        return self._build(image, **kwargs)
+    def unload_all(self):
+        """释放 load_all 加载的全部数据, 包括 v5 的 sprite"""
+        for item in self.loadables():
+            item.unload()
 
     def _build(self, image: Image, **kwargs) -> PILImage:
         data = FormatConvertor.to_raw(image.data, image.format)
@@ -128,4 +207,4 @@ class IMG:
 
     def image_by_index(self, index: int) -> Image | ImageLink | None:
         if 0 <= index < len(self._images):
-            return self._images[index]
+            return self._open_image(index)
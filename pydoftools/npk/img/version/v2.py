@@ -1,14 +1,28 @@
+import sys
 import typing
+from array import array
+from itertools import accumulate
 
-from pydoftools.npk.consts import IMAGE_EXTRA_ZLIB_SPRITE, IMG_MAGIC, IMG_VERSION_2
+from pydoftools.npk.consts import (IMAGE_EXTRA_NONE, IMAGE_EXTRA_ZLIB_SPRITE, IMAGE_FORMAT_LINK, IMG_MAGIC,
+                                   IMG_VERSION_2, PIX_SIZE)
 from pydoftools.utils.io import write_ascii_string, write_struct
 from .v1 import IMGv1
 from ..image import ImageFactory, ImageLink, SpriteZlibImage, ZlibImage
 
 
 class IMGv2(IMGv1):
+    def __init__(self):
+        super().__init__()
+        # lazy mode: int32 header table, record start of each image and data offsets.
+        self._header = array('i')
+        self._positions = array('I')
+        self._offsets = array('q')
+
     def _callback_images_open(self, count: int):
         io = self._io
+        if self._lazy:
+            self._open_header_table(count)
+            return
 
         images = []
         for _ in range(count):
@@ -17,7 +31,73 @@ class IMGv2(IMGv1):
 
         self._images = images
 
+    def _open_header_table(self, count: int):
+        # every header value is an int32, the whole table is read at once.
+        start = self._io.tell()
+        data = self._io.read(count * 4 * 16)
+        header = array('i')
+        header.frombytes(data[:len(data) // 4 * 4])
+        if sys.byteorder == 'big':
+            header.byteswap()
+
+        positions = ImageFactory.scan(header, count)
+        end = positions[-1] + self._record_ints(header, positions[-1]) if count else 0
+        del header[end:]
+        self._io.seek(start + end * 4)
+
+        self._header = header
+        self._positions = positions
+        self._images = [None] * count
+        self._pending = count
+
+    @staticmethod
+    def _record_ints(header: array, pos: int) -> int:
+        if header[pos] == IMAGE_FORMAT_LINK:
+            return 2
+        return 2 + ImageFactory.cls_extra_map[header[pos + 1]].HEADER_INTS
+
+    def _data_size(self, pos: int) -> int:
+        header = self._header
+        if header[pos] == IMAGE_FORMAT_LINK or header[pos + 1] == IMAGE_EXTRA_ZLIB_SPRITE:
+            return 0
+        if self._version == IMG_VERSION_2 and header[pos + 1] == IMAGE_EXTRA_NONE:
+            # w * h * pix size, same as fix_size.
+            return header[pos + 2] * header[pos + 3] * PIX_SIZE[header[pos]]
+        return header[pos + 4]
+
+    def _open_image(self, index: int):
+        image = self._images[index]
+        if image is not None:
+            return image
+
+        pos = self._positions[index]
+        image = ImageFactory.from_header(self._header, pos, self._images,
+                                         fix_size=self._version == IMG_VERSION_2)
+        self._images[index] = image
+        self._pending -= 1
+        if isinstance(image, ImageLink):
+            if 0 <= image.index < len(self._images):
+                self._open_image(image.index)
+            image.load_image()
+        elif image.extra != IMAGE_EXTRA_ZLIB_SPRITE:
+            image.set_io_info(self._offsets[index], self._io)
+
+        if not self._pending:
+            # every image exists now, the table is no longer needed.
+            self._header = array('i')
+            self._positions = array('I')
+            self._offsets = array('q')
+        return image
+
     def _callback_after_images_open(self, images_size: int):
+        if self._lazy:
+            offset = images_size + 32 if self._version == IMG_VERSION_2 else self._io.tell()
+            offset = self._callback_before_count_image_offset(offset)
+            # offset of each image is the prefix sum of the sizes before it.
+            sizes = map(self._data_size, self._positions)
+            self._offsets = array('q', accumulate(sizes, initial=offset))
+            return
+
         super()._callback_after_images_open(images_size)
         io = self._io
 
@@ -37,7 +37,7 @@ class IMGv4(IMGv2):
             color_board = self._color_board
 
         if image.extra == IMAGE_EXTRA_ZLIB and len(color_board.colors):
-            data = FormatConvertor.to_raw_indexes(image.data, color_board.colors)
+            data = FormatConvertor.to_raw_indexes(image.data, color_board)
         else:
             data = FormatConvertor.to_raw(image.data, image.format)
 
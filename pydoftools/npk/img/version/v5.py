@@ -33,11 +33,8 @@ class IMGv5(IMGv4):
 
         return offset
 
-    def load_all(self, force=False):
-        super().load_all(force)
-
-        for sprite in self._sprites:
-            sprite.load(force)
+    def loadables(self) -> list[Image | Sprite]:
+        return super().loadables() + self._sprites
 
     @property
     def sprites(self) -> list[Sprite]:
@@ -46,7 +43,7 @@ class IMGv5(IMGv4):
     @property
     def images_header_size(self) -> int:
         size = super().images_header_size
-        for image in self._images:
+        for image in self.images:
             if isinstance(image, SpriteZlibImage):
                 # keep, sprite_index, left, top, right, bottom, rotate
                 size += 28
@@ -86,11 +83,12 @@ class IMGv5(IMGv4):
 
         super()._callback_after_images_save(io)
 
-    def _build(self, image: Image, **kwargs) -> PILImage:
+    def _build(self, image: Image, cache_sprite=True, **kwargs) -> PILImage:
         if isinstance(image, SpriteZlibImage):
             l, t, r, b = image.left, image.top, image.right, image.bottom
             sprite = self._sprites[image.sprite_index]
-            result = sprite.build((l, t, r, b), image.rotate)
+            # frames of one atlas share a single decode.
+            result = sprite.build((l, t, r, b), image.rotate, cache=cache_sprite)
         else:
             result = super()._build(image, **kwargs)
 
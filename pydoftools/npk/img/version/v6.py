@@ -6,7 +6,7 @@ from PIL import Image as PILImage
 from pydoftools.utils.image import load_raw
 from pydoftools.utils.io import read_struct, write_struct
 from .v2 import IMGv2
-from ..image import ColorBoard, FormatConvertor, Image
+from ..image import ColorBoard, FormatConvertor, Image, ImageLink
 
 
 class IMGv6(IMGv2):
@@ -50,17 +50,26 @@ class IMGv6(IMGv2):
         for color_board in self._color_boards:
             color_board.save(io)
 
-    def build(self, image: Image, color_board: ColorBoard = None, **kwargs) -> PILImage:
-        return super().build(image, color_board=color_board, **kwargs)
+    def build(self, image: Image, color_board: ColorBoard = None, drop_data=False, **kwargs) -> PILImage:
+        return super().build(image, drop_data=drop_data, color_board=color_board, **kwargs)
 
     def _build(self, image: Image, color_board: ColorBoard = None, **kwargs) -> PILImage:
         if color_board is None and len(self._color_boards) > 0:
             color_board = self._color_boards[0]
 
-        data = FormatConvertor.to_raw_indexes(image.data, color_board.colors)
+        data = FormatConvertor.to_raw_indexes(image.data, color_board)
         result = load_raw(data, image.w, image.h)
         return result
 
+    def build_color_boards(self, image: Image) -> list[PILImage]:
+        if isinstance(image, ImageLink):
+            image = image.final_image
+
+        # indexes are decoded once and shared by every color board.
+        data = image.data
+        return [load_raw(FormatConvertor.to_raw_indexes(data, color_board), image.w, image.h)
+                for color_board in self._color_boards]
+
     def color_board_by_index(self, index: int) -> ColorBoard | None:
         if 0 <= index < len(self._color_boards):
             return self._color_boards[index]
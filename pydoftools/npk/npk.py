@@ -1,13 +1,21 @@
+import bisect
+import fnmatch
+import gc
 import hashlib
 import io
+import mmap
 import os
 import typing
 from io import BytesIO
 from pathlib import Path
 
+from PIL.Image import Image as PILImage
+from loguru import logger
+
 from .consts import NPK_MAGIC
 from .file import File
-from ..utils.io import (read_ascii_string, read_range, read_struct,
+from .frame_cache import FrameCache, default_frame_cache
+from ..utils.io import (MemoryIO, read_ascii_string, read_range, read_struct,
                         write_ascii_string, write_struct)
 
 
@@ -15,9 +23,26 @@ class NotNPKFileException(Exception):
     pass
 
 
+def _glob_escape(name: str) -> str:
+    return ''.join(f'[{char}]' if char in '*?[' else char for char in name)
+
+
 class NPK:
     def __init__(self):
         self._files: list[File] = []
+        self._mmap: mmap.mmap | None = None
+        # the stream every file reads from when opened by open_mmap.
+        self._mmap_io: MemoryIO | None = None
+        # source file, frames are only cached for npks with a path.
+        self.path: str | None = None
+
+        # name -> index of the first file with that name.
+        self._name_index: dict[str, int] | None = None
+        self._lower_index: dict[str, int] = {}
+        # lower names sorted for prefix lookups, with their indexes.
+        self._sorted_names: list[str] = []
+        self._sorted_indexes: list[int] = []
+        self._indexed_size = 0
 
     @classmethod
     def open(cls, io: typing.IO) -> 'NPK':
@@ -28,15 +53,80 @@ class NPK:
         count, = read_struct(io, 'i')
 
         npk = cls()
+        name = getattr(io, 'name', None)
+        if isinstance(name, str):
+            npk.path = name
         for i in range(count):
             npk.files.append(File.open(io))
 
+        npk.reindex()
+        return npk
+
+    @classmethod
+    def open_mmap(cls, path: os.PathLike) -> 'NPK':
+        with open(path, 'rb') as fp:
+            mm = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+
+        mm_io = MemoryIO(mm)
+        try:
+            npk = cls.open(mm_io)
+        except BaseException:
+            mm_io.close()
+            mm.close()
+            raise
+
+        npk._mmap = mm
+        npk._mmap_io = mm_io
+        npk.path = str(path)
         return npk
 
+    def close(self):
+        """关闭 open_mmap 的映射, 之后未复制出去的文件数据和 img 都不可再用"""
+        if self._mmap is None:
+            return
+
+        # drop every view of the mapping held by the files.
+        for file in self._files:
+            if file._io is self._mmap_io:
+                file._io = None
+                if isinstance(file._data, memoryview):
+                    file._data = None
+                file._img = None
+        self._mmap_io.close()
+        self._mmap_io = None
+
+        try:
+            self._mmap.close()
+        except BufferError:
+            # image links keep their img in a reference cycle, collect it and retry.
+            gc.collect()
+            try:
+                self._mmap.close()
+            except BufferError:
+                # slices are still referenced by the caller, the mapping is released with them.
+                logger.warning('NPK {} is still referenced, the mapping stays open until it is released.', self.path)
+        self._mmap = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
     def load_all(self):
         for f in self._files:
             f.load()
 
+    def preload(self, workers: int | None = None, max_mb: float = 64) -> int:
+        """打开所有 img 并在线程池中解压全部贴图, 返回解压的数量.
+
+        img 由 File.open_img 保留, 之后的 build_frame 不再解压. workers 为 None 时使用全部 cpu.
+        """
+        from .img.version.img import load_parallel
+        workers = workers or os.cpu_count() or 1
+        items = (item for file in self._files for item in file.open_img().loadables())
+        return load_parallel(items, workers=workers, max_mb=max_mb)
+
     def save(self, io: typing.IO = None, group_by_md5=True):
         files = self._files
 
@@ -85,10 +175,128 @@ class NPK:
             file.save(io_header, offset, io)
             offset += file.data_size
 
-    def file_by_name(self, name: str) -> typing.Optional[File]:
-        for file in self._files:
-            if name == file.name:
-                return file
+    def reindex(self):
+        self._name_index = {}
+        self._lower_index = {}
+        self._sorted_names = []
+        self._sorted_indexes = []
+        self._indexed_size = 0
+
+        for index, file in enumerate(self._files):
+            self._index_file(file, index)
+
+        order = sorted(range(len(self._sorted_names)), key=self._sorted_names.__getitem__)
+        self._sorted_names = [self._sorted_names[i] for i in order]
+        self._sorted_indexes = [self._sorted_indexes[i] for i in order]
+
+    def _index_file(self, file: File, index: int, keep_sorted=False):
+        lower = file.name.lower()
+        self._name_index.setdefault(file.name, index)
+        self._lower_index.setdefault(lower, index)
+        if keep_sorted:
+            i = bisect.bisect_right(self._sorted_names, lower)
+            self._sorted_names.insert(i, lower)
+            self._sorted_indexes.insert(i, index)
+        else:
+            self._sorted_names.append(lower)
+            self._sorted_indexes.append(index)
+        self._indexed_size += 1
+
+    def _ensure_index(self):
+        # files may be appended to `files` directly, catch up when sizes differ.
+        if self._name_index is None or self._indexed_size != len(self._files):
+            self.reindex()
+
+    def add_file(self, file: File) -> int:
+        self._ensure_index()
+        index = len(self._files)
+        self._files.append(file)
+        self._index_file(file, index, keep_sorted=True)
+        return index
+
+    def remove_file(self, file: File) -> bool:
+        if file not in self._files:
+            return False
+
+        self._files.remove(file)
+        self.reindex()
+        return True
+
+    def index_by_name(self, name: str, ignore_case=False) -> int | None:
+        self._ensure_index()
+        if ignore_case:
+            return self._lower_index.get(name.lower())
+        return self._name_index.get(name)
+
+    def file_by_name(self, name: str, ignore_case=False) -> typing.Optional[File]:
+        index = self.index_by_name(name, ignore_case)
+        if index is not None:
+            return self._files[index]
+
+    def files_by_prefix(self, prefix: str) -> list[File]:
+        return self.files_by_glob(_glob_escape(prefix) + '*')
+
+    def files_by_glob(self, pattern: str) -> list[File]:
+        """按 glob 模式匹配文件名 (不区分大小写), 结果按文件在 npk 中的顺序返回"""
+        self._ensure_index()
+        pattern = pattern.lower()
+
+        # only names sharing the literal prefix can match.
+        prefix = pattern
+        for i, char in enumerate(pattern):
+            if char in '*?[':
+                prefix = pattern[:i]
+                break
+
+        names = self._sorted_names
+        indexes = []
+        for i in range(bisect.bisect_left(names, prefix), len(names)):
+            name = names[i]
+            if not name.startswith(prefix):
+                break
+            if fnmatch.fnmatchcase(name, pattern):
+                indexes.append(self._sorted_indexes[i])
+
+        return [self._files[i] for i in sorted(indexes)]
+
+    def build_frame(self,
+                    name: str,
+                    index: int,
+                    color_board: int | None = None,
+                    cache: FrameCache | None = default_frame_cache,
+                    drop_data=False) -> PILImage | None:
+        """构建 img 中的一帧, 结果按 (npk 路径, img 名, 帧序号, 色板序号) 缓存.
+
+        color_board 为 v6 色板序号, drop_data 为 True 时构建后释放这一帧的解压数据,
+        v5 的 sprite 不会释放, 需要时调用 File.open_img().unload_all().
+        """
+        key = (self.path, name, index, color_board)
+        if cache is not None and self.path is not None:
+            image = cache.get(key)
+            if image is not None:
+                return image
+
+        file = self.file_by_name(name)
+        if file is None:
+            return None
+        img = file.open_img()
+        image = img.image_by_index(index)
+        if image is None:
+            return None
+
+        kwargs = {}
+        if color_board is not None:
+            color_boards = getattr(img, 'color_boards', None)
+            if color_boards is None:
+                raise ValueError(f'{name} is {type(img).__name__}, only IMGv6 has color boards')
+            if not 0 <= color_board < len(color_boards):
+                raise ValueError(f'{name} has {len(color_boards)} color boards, got index {color_board}')
+            kwargs['color_board'] = color_boards[color_board]
+        result = img.build(image, drop_data=drop_data, **kwargs)
+
+        if cache is not None and self.path is not None:
+            cache.put(key, result)
+        return result
 
     def file_by_index(self, index: int) -> typing.Optional[File]:
         if 0 <= index < len(self._files):
@@ -1,2 +1,3 @@
 from .reader import PvfReader
 from .parser import Parser, LstParser
+from .cache import ContentCache
@@ -0,0 +1,136 @@
+import threading
+import typing
+from collections import OrderedDict
+
+K = typing.TypeVar('K')
+V = typing.TypeVar('V')
+
+
+class CacheInfo(typing.NamedTuple):
+    hits: int
+    misses: int
+    maxsize: int | None
+    currsize: int
+
+
+class LRUCache(typing.Generic[K, V]):
+    """按 LRU 淘汰的缓存, 记录命中和未命中次数.
+
+    maxsize 为 None 时不淘汰, 为 0 时不缓存.
+    """
+
+    def __init__(self, maxsize: int | None = 128):
+        self.maxsize = maxsize
+        self.data: OrderedDict[K, V] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: K, default: V | None = None) -> V | None:
+        value = self.data.get(key, _MISSING)
+        if value is _MISSING:
+            self.misses += 1
+            return default
+        self.hits += 1
+        self.data.move_to_end(key)
+        return value
+
+    def put(self, key: K, value: V):
+        if self.maxsize == 0:
+            return
+        self.data[key] = value
+        self.data.move_to_end(key)
+        if self.maxsize is not None and len(self.data) > self.maxsize:
+            self.data.popitem(last=False)
+
+    def get_or_load(self, key: K, loader: typing.Callable[[K], V]) -> V:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = loader(key)
+            self.put(key, value)
+        return value
+
+    def cache_info(self) -> CacheInfo:
+        return CacheInfo(self.hits, self.misses, self.maxsize, len(self.data))
+
+    def clear(self):
+        self.data.clear()
+        self.hits = self.misses = 0
+
+    def __contains__(self, key) -> bool:
+        return key in self.data
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+
+_MISSING = object()
+
+
+class ContentCacheInfo(typing.NamedTuple):
+    hits: int
+    misses: int
+    evictions: int
+    max_bytes: int
+    currbytes: int
+    currsize: int
+
+
+class ContentCache:
+    """按字节数限制大小的 LRU 缓存, 可由多个 PvfReader / AsyncPvfReader 共享.
+
+    键中包含 pvf 路径, 解密后的内容和解析结果分开存放, cache_parsed 为 False 时不缓存解析结果.
+    """
+
+    # rough memory cost of one parsed FileContentField.
+    FIELD_SIZE = 100
+
+    def __init__(self, max_mb: float = 64, cache_parsed: bool = False):
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.cache_parsed = cache_parsed
+        self.data: OrderedDict[typing.Hashable, tuple[typing.Any, int]] = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: typing.Hashable, default=None):
+        with self._lock:
+            item = self.data.get(key)
+            if item is None:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self.data.move_to_end(key)
+            return item[0]
+
+    def put(self, key: typing.Hashable, value, size: int):
+        """size 超过 max_bytes 的值不缓存"""
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self.data.pop(key, None)
+            if old is not None:
+                self.size -= old[1]
+            self.data[key] = (value, size)
+            self.size += size
+            while self.size > self.max_bytes:
+                _, (_, evicted) = self.data.popitem(last=False)
+                self.size -= evicted
+                self.evictions += 1
+
+    def cache_info(self) -> ContentCacheInfo:
+        return ContentCacheInfo(self.hits, self.misses, self.evictions, self.max_bytes, self.size, len(self.data))
+
+    def clear(self):
+        with self._lock:
+            self.data.clear()
+            self.size = 0
+            self.hits = self.misses = self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+
+# used by readers that are not given a cache of their own.
+default_content_cache = ContentCache()
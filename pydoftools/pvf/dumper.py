@@ -0,0 +1,243 @@
+import argparse
+import dataclasses
+import json
+import os
+import time
+import typing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from loguru import logger
+
+from .formatter import PvfUtilityFormatter
+from .parser import Parser
+from .reader import PvfReader, fake_tqdm
+
+# pvf path -> crc32 of every exported file, written after the export.
+DUMP_MANIFEST = '.crc32.json'
+# index cache shared by the workers, kept in the output instead of next to the pvf.
+DUMP_INDEX_CACHE = '.index.idx'
+# files stored as plain text instead of script units.
+TEXT_SUFFIXES = ('.str', '.nut', '.txt')
+# index tables, already expanded into the scripts that use them.
+SKIP_FILES = frozenset(('stringtable.bin',))
+DUMP_CHUNK_SIZE = 4 << 20
+# seconds between manifest saves, an interrupted dump resumes from the last one.
+MANIFEST_SAVE_INTERVAL = 30
+
+
+@dataclasses.dataclass
+class DumpStats:
+    """一次导出的统计"""
+    files: int = 0
+    skipped: int = 0
+    failed: int = 0
+    bytes_in: int = 0
+    bytes_out: int = 0
+    seconds: float = 0
+
+    def __str__(self):
+        seconds = self.seconds or 1e-9
+        return (f'{self.files} files exported, {self.skipped} unchanged, {self.failed} failed, '
+                f'{self.bytes_in / 2 ** 20:.1f} MB in / {self.bytes_out / 2 ** 20:.1f} MB out in {self.seconds:.1f}s '
+                f'({self.files / seconds:.0f} files/s, {self.bytes_in / 2 ** 20 / seconds:.1f} MB/s)')
+
+
+def dump_pvf(path: os.PathLike,
+             out: os.PathLike,
+             workers: int | None = None,
+             force=False,
+             encode: str = 'big5',
+             locale: str | None = 'zh-cn',
+             chunk_size: int = DUMP_CHUNK_SIZE,
+             use_tqdm=False,
+             index_cache: bool | os.PathLike = True) -> DumpStats:
+    """把整个 pvf 导出为 PvfUtility 风格的文本目录.
+
+    文件按加密后的大小分成约 chunk_size 字节的块, 由 workers 个进程各自打开 pvf 处理,
+    workers 为 None 时使用全部 cpu. crc32 未变化且已导出的文件会被跳过, force 为 True 时全部重新导出.
+    index_cache 为 True 时索引缓存写在 out 下, 也可以指定路径, False 时每个进程各自解析文件树.
+    """
+    started = time.perf_counter()
+    path, out = Path(path), Path(out)
+    out.mkdir(parents=True, exist_ok=True)
+
+    tqdm = fake_tqdm
+    if use_tqdm:
+        try:
+            from tqdm import tqdm
+        except ImportError:
+            logger.warning('tqdm not found, use_tqdm will be ignored.')
+
+    # the workers start from the index cache instead of parsing the tree again.
+    if index_cache is True:
+        index_cache = out / DUMP_INDEX_CACHE
+    reader_args = (str(path), encode, locale, index_cache and str(index_cache))
+    reader = _open_reader(*reader_args)
+    tree = reader.files_map
+    manifest = {} if force else _read_manifest(out)
+    current = dict(zip(tree.paths, tree.file_crc32s))
+
+    stats = DumpStats()
+    todo = []
+    for p, crc32 in current.items():
+        if p in SKIP_FILES:
+            continue
+        if manifest.get(p) == crc32 and (out / p).exists():
+            stats.skipped += 1
+            continue
+        todo.append(p)
+    todo.sort(key=reader._file_offset)
+    chunks = list(_chunks(todo, tree, chunk_size))
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        # reuse the index reader, _init_worker is only for pool processes.
+        try:
+            results = (_dump_chunk(reader, str(out), chunk) for chunk in chunks)
+            stats = _collect(tqdm(results, total=len(chunks)), stats, manifest, current, out)
+        finally:
+            reader._fp.close()
+    else:
+        reader._fp.close()
+        with ProcessPoolExecutor(min(workers, len(chunks) or 1), initializer=_init_worker,
+                                 initargs=reader_args) as executor:
+            futures = [executor.submit(_worker_dump_chunk, str(out), chunk) for chunk in chunks]
+            results = (f.result() for f in as_completed(futures))
+            stats = _collect(tqdm(results, total=len(chunks)), stats, manifest, current, out)
+
+    _save_manifest(out, manifest, current)
+    stats.seconds = time.perf_counter() - started
+    logger.info('PVF dump finished: {}', stats)
+    return stats
+
+
+def _chunks(paths: list[str], tree, chunk_size: int) -> typing.Generator[list[str], None, None]:
+    chunk, size = [], 0
+    for p in paths:
+        chunk.append(p)
+        size += tree[p].file_length
+        if size >= chunk_size:
+            yield chunk
+            chunk, size = [], 0
+    if chunk:
+        yield chunk
+
+
+def _collect(results, stats: DumpStats, manifest: dict[str, int], current: dict[str, int], out: Path) -> DumpStats:
+    saved = time.monotonic()
+    for done, failed, bytes_in, bytes_out in results:
+        stats.files += len(done)
+        stats.failed += len(failed)
+        # the workers drop their log handlers, report for them here.
+        for p, error in failed:
+            logger.warning('Dump {} failed: {}', p, error)
+        stats.bytes_in += bytes_in
+        stats.bytes_out += bytes_out
+        for p in done:
+            manifest[p] = current[p]
+        if time.monotonic() - saved >= MANIFEST_SAVE_INTERVAL:
+            _save_manifest(out, manifest, current)
+            saved = time.monotonic()
+    return stats
+
+
+def _open_reader(path: str, encode: str, locale: str | None, index_cache: str | bool) -> PvfReader:
+    # every file is read once, caching the contents only costs memory.
+    index_cache = Path(index_cache) if index_cache else False
+    reader = PvfReader(Path(path), encode, index_cache=index_cache, locale=locale, content_cache=None)
+    reader.read()
+    return reader
+
+
+# the reader of a pool worker process, set by _init_worker.
+_reader: PvfReader | None = None
+
+
+def _init_worker(path: str, encode: str, locale: str | None, index_cache: str | bool):
+    global _reader
+    # only in pool processes, the workers would repeat the parent's logs.
+    logger.remove()
+    _reader = _open_reader(path, encode, locale, index_cache)
+
+
+# done paths, (path, error) of failed ones, bytes in, bytes out.
+ChunkResult = tuple[list[str], list[tuple[str, str]], int, int]
+
+
+def _worker_dump_chunk(out: str, paths: list[str]) -> ChunkResult:
+    return _dump_chunk(_reader, out, paths)
+
+
+def _dump_chunk(reader: PvfReader, out: str, paths: list[str]) -> ChunkResult:
+    done, failed = [], []
+    bytes_in = bytes_out = 0
+    for p in paths:
+        target = Path(out, p)
+        # a failed render must not leave a partial file that looks exported.
+        tmp = target.with_name(target.name + f'.{os.getpid()}.tmp')
+        try:
+            c = reader.read_file_content(p)
+            target.parent.mkdir(parents=True, exist_ok=True)
+            with tmp.open('w', encoding='utf-8', newline='') as fp:
+                _render_to(reader, c, p, fp)
+            os.replace(tmp, target)
+        except Exception as e:
+            tmp.unlink(missing_ok=True)
+            failed.append((p, str(e)))
+            continue
+
+        done.append(p)
+        bytes_in += len(c)
+        bytes_out += target.stat().st_size
+    return done, failed, bytes_in, bytes_out
+
+
+def _render_to(reader: PvfReader, c: bytes, path: str, fp: typing.TextIO):
+    if path.endswith(TEXT_SUFFIXES):
+        # the tree pads file contents to 4 bytes with nul.
+        fp.write(reader.converter.convert(c.decode(reader.encode, 'ignore').rstrip('\0')))
+    else:
+        PvfUtilityFormatter(Parser.parse(c, reader)).render_to(fp)
+
+
+def _read_manifest(out: Path) -> dict[str, int]:
+    try:
+        return json.loads((out / DUMP_MANIFEST).read_text('utf-8'))
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_manifest(out: Path, manifest: dict[str, int], current: dict[str, int]):
+    # drop files no longer in the pvf so the manifest does not grow forever.
+    _write_manifest(out, {p: c for p, c in manifest.items() if current.get(p) == c})
+
+
+def _write_manifest(out: Path, manifest: dict[str, int]):
+    # saved while the dump runs, never leave a half written one.
+    tmp = out / (DUMP_MANIFEST + '.tmp')
+    tmp.write_text(json.dumps(manifest), 'utf-8')
+    os.replace(tmp, out / DUMP_MANIFEST)
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description='Dump a pvf into PvfUtility style text files.')
+    parser.add_argument('pvf', type=Path)
+    parser.add_argument('out', type=Path)
+    parser.add_argument('-j', '--workers', type=int, default=None)
+    parser.add_argument('-f', '--force', action='store_true', help='export unchanged files again')
+    parser.add_argument('--encode', default='big5')
+    parser.add_argument('--locale', default='zh-cn', help="zhconv locale, 'none' keeps the original text")
+    parser.add_argument('--index-cache', type=Path, default=None,
+                        help=f'index cache path, defaults to {DUMP_INDEX_CACHE} in the output directory')
+    parser.add_argument('--no-index-cache', action='store_true', help='parse the file tree in every worker')
+    args = parser.parse_args(argv)
+    locale = None if args.locale.lower() == 'none' else args.locale
+    index_cache = False if args.no_index_cache else args.index_cache or True
+    stats = dump_pvf(args.pvf, args.out, args.workers, args.force, args.encode, locale, use_tqdm=True,
+                     index_cache=index_cache)
+    print(stats)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,11 +1,13 @@
-import dataclasses
 import struct
+import sys
+import typing
+from array import array
+from collections import OrderedDict
 
-from zhconv import convert
+from .text import TextConverter
 
 
-@dataclasses.dataclass
-class FileTreeNode:
+class FileTreeNode(typing.NamedTuple):
     index: int
     fn: int
     file_path_len: int
@@ -16,30 +18,160 @@ class FileTreeNode:
     # content: bytes = None
 
 
+_TREE_HEAD = struct.Struct('<2I')
+_TREE_TAIL = struct.Struct('<3I')
+
+
+class FileTree(typing.Mapping[str, FileTreeNode]):
+    """文件树的列式存储, 以路径为键的只读映射, FileTreeNode 在访问时才创建"""
+
+    columns = ('indexes', 'fns', 'path_lens', 'file_lengths', 'file_crc32s', 'relative_offsets')
+
+    def __init__(self):
+        self.indexes = array('I')
+        self.fns = array('I')
+        self.path_lens = array('I')
+        self.file_lengths = array('I')
+        self.file_crc32s = array('I')
+        self.relative_offsets = array('I')
+        self.paths: list[str] = []
+        self._path_index: dict[str, int] = {}
+
+    @classmethod
+    def parse(cls, data: bytes, count: int) -> 'FileTree':
+        tree = cls()
+        head = _TREE_HEAD.unpack_from
+        tail = _TREE_TAIL.unpack_from
+
+        # flat (fn, path_len) and (length, crc32, offset) words.
+        heads, tails, path_bytes = array('I'), array('I'), []
+        add_head, add_tail, add_path = heads.extend, tails.extend, path_bytes.append
+        idx = 0
+        for _ in range(count):
+            tree.indexes.append(idx)
+            h = head(data, idx)
+            add_head(h)
+            path_len = h[1]
+            idx += 8
+            add_path(data[idx:idx + path_len])
+            idx += path_len
+            add_tail(tail(data, idx))
+            idx += 12
+
+        tree.fns = heads[0::2]
+        tree.path_lens = heads[1::2]
+        tree.file_lengths = array('I', [(length + 3) & 0xFFFFFFFC for length in tails[0::3]])
+        tree.file_crc32s = tails[1::3]
+        tree.relative_offsets = tails[2::3]
+
+        if count:
+            # '\0' never appears inside a CP949 character, decode all paths at once.
+            paths = b'\0'.join(path_bytes).decode('CP949').lower().split('\0')
+            tree.set_paths([p.removeprefix('/') for p in paths])
+
+        return tree
+
+    def set_paths(self, paths: list[str]):
+        self.paths = paths
+        self._path_index = dict(zip(paths, range(len(paths))))
+
+    def node(self, i: int) -> FileTreeNode:
+        return FileTreeNode(
+            index=self.indexes[i],
+            fn=self.fns[i],
+            file_path_len=self.path_lens[i],
+            file_path=self.paths[i],
+            file_length=self.file_lengths[i],
+            file_crc32=self.file_crc32s[i],
+            relative_offset=self.relative_offsets[i],
+        )
+
+    def nodes(self) -> typing.Iterator[FileTreeNode]:
+        return map(FileTreeNode._make, zip(self.indexes, self.fns, self.path_lens, self.paths,
+                                           self.file_lengths, self.file_crc32s, self.relative_offsets))
+
+    def index_of(self, path: str) -> int | None:
+        return self._path_index.get(path)
+
+    def __getitem__(self, path: str) -> FileTreeNode:
+        return self.node(self._path_index[path])
+
+    def __contains__(self, path) -> bool:
+        return path in self._path_index
+
+    def __iter__(self) -> typing.Iterator[str]:
+        return iter(self._path_index)
+
+    def __len__(self) -> int:
+        return len(self._path_index)
+
+
 class StringTable:
+    """stringtable.bin 的只读视图, 字符串在访问时才解码.
+
+    cache_size 为 None 时缓存所有已解码的字符串, 为 0 时不缓存, 否则按 LRU 保留最近的 cache_size 个.
+    """
 
-    def __init__(self, content: bytes, encode: str = 'big5'):
-        self.length = struct.unpack('I', content[:4])[0]
-        self.content = content[4:]
-        self.chunk = bytearray(content[4 + self.length * 4 + 4:])
-        self.add_count = 0
-        self.cached: dict[int, str] = {}
+    def __init__(self,
+                 content: bytes,
+                 encode: str = 'big5',
+                 cache_size: int | None = None,
+                 converter: TextConverter | None = None):
+        self.raw = content
+        view = memoryview(content)
+        self.length = struct.unpack_from('<I', view)[0]
+        # offsets are relative to the data behind the count.
+        self.content = view[4:]
+        self.offsets = array('I')
+        self.offsets.frombytes(self.content[:(self.length + 1) * 4])
+        if sys.byteorder == 'big':
+            self.offsets.byteswap()
         self.encode = encode
+        self.converter = converter or TextConverter(encode=encode)
+
+        self.cache_size = cache_size
+        self.cached: dict[int, str] = {} if cache_size is None else OrderedDict()
+        self._all: list[str] | None = None
+        self._reverse: dict[str, int] | None = None
 
     def __len__(self):
         return self.length * 2
 
     def __getitem__(self, item: int) -> str:
-        if item not in self.cached:
-            self.cached[item] = self._convert(self.content[item * 4: item * 4 + 8])
-
-        return self.cached[item]
-
-    def _convert(self, c: bytes):
-        str_idx = struct.unpack('<II', c)
-        bias = self.length * 4 + 4
-        return convert(
-            self.chunk[str_idx[0] - bias:str_idx[1] - bias].decode(self.encode,
-                                                                   'ignore'),
-            'zh-cn'
-        )
+        if self._all is not None:
+            return self._all[item]
+
+        cached = self.cached
+        value = cached.get(item)
+        if value is not None:
+            if self.cache_size:
+                cached.move_to_end(item)
+            return value
+
+        value = self.converter.decode(self._raw(item))
+        if self.cache_size is None:
+            cached[item] = value
+        elif self.cache_size > 0:
+            cached[item] = value
+            if len(cached) > self.cache_size:
+                cached.popitem(last=False)
+        return value
+
+    def _raw(self, item: int) -> memoryview:
+        if not 0 <= item < self.length:
+            raise IndexError(f'String index {item} out of range')
+        return self.content[self.offsets[item]:self.offsets[item + 1]]
+
+    def decode_all(self) -> list[str]:
+        """一次解码并转换全部字符串, 之后的访问不再解码"""
+        if self._all is None:
+            self._all = self.converter.decode_many([self._raw(i) for i in range(self.length)])
+            self.cached.clear()
+        return self._all
+
+    def index_of(self, value: str) -> int | None:
+        """按字符串反查 id, 重复的字符串返回最小的 id"""
+        if self._reverse is None:
+            strings = self.decode_all()
+            self._reverse = {s: i for i, s in reversed(list(enumerate(strings)))}
+        return self._reverse.get(value)
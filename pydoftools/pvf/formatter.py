@@ -1,8 +1,12 @@
+import typing
+
 from .enums import FieldType
 from .parser import Parser
 
 
 class PvfUtilityFormatter:
+    # fields joined into one chunk by iter_render.
+    CHUNK_FIELDS = 1024
 
     def __init__(self, parser: Parser):
         self.parser = parser
@@ -11,16 +15,34 @@ class PvfUtilityFormatter:
         return '#PVF_File'
 
     def render(self):
-        data = ''
-        for f in self.parser.origin:
-            match f.tp:
+        return ''.join(self.iter_render())
+
+    def render_to(self, fp: typing.TextIO) -> int:
+        """写入文本文件对象, 返回写入的字符数"""
+        size = 0
+        for chunk in self.iter_render():
+            size += fp.write(chunk)
+        return size
+
+    def iter_render(self) -> typing.Generator[str, None, None]:
+        """按块产出渲染结果, 不在内存中拼接整个文件"""
+        yield self.render_header()
+        parts = []
+        for tp, value in zip(self.parser.types, self.parser.values):
+            match tp:
                 case FieldType.STR.value:
-                    data += f'\t`{f.value}`'
+                    parts.append(f'\t`{value}`')
                 case FieldType.KEY.value:
-                    if not f.value.startswith('[/'):
-                        data += '\n'
-                    data += f'\n{f.value}\n'
+                    if value.startswith('[/'):
+                        parts.append(f'\n{value}\n')
+                    else:
+                        parts.append(f'\n\n{value}\n')
                 case _:
-                    data += f'\t{f.value}'
+                    parts.append(f'\t{value}')
+
+            if len(parts) >= self.CHUNK_FIELDS:
+                yield ''.join(parts)
+                parts = []
 
-        return self.render_header() + data
+        if parts:
+            yield ''.join(parts)
@@ -0,0 +1,143 @@
+import mmap
+import os
+import struct
+import sys
+from array import array
+from pathlib import Path
+
+from loguru import logger
+
+from .file_tree import FileTree
+
+# magic, version, pvf size, pvf mtime_ns, dir_tree_crc32, file_count,
+# n_string count, paths size, string table size, n_string strings size
+_HEAD = struct.Struct('<8sIQqIIIQQQ')
+
+
+class PvfIndexCache:
+    """PvfReader 启动索引的磁盘缓存.
+
+    保存文件树各列, 路径, stringtable.bin 解密内容和 n_string 映射,
+    以 pvf 的大小, 修改时间和 dir_tree_crc32 为键, 不匹配时视为过期.
+    """
+
+    MAGIC = b'PYDOFIDX'
+    VERSION = 1
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._mmap: mmap.mmap | None = None
+
+    @classmethod
+    def sidecar(cls, pvf_path: Path) -> 'PvfIndexCache':
+        pvf_path = Path(pvf_path)
+        return cls(pvf_path.with_name(pvf_path.name + '.idx'))
+
+    @staticmethod
+    def make_key(pvf_path: Path, dir_tree_crc32: int, file_count: int) -> tuple[int, int, int, int]:
+        st = os.stat(pvf_path)
+        return st.st_size, st.st_mtime_ns, dir_tree_crc32, file_count
+
+    def load(self, key: tuple[int, int, int, int]) -> tuple[FileTree, memoryview, dict[int, str]] | None:
+        """读取缓存, 不存在, 过期或损坏时返回 None"""
+        try:
+            with self.path.open('rb') as f:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+
+        try:
+            result = self._load(memoryview(mm), key)
+        except (struct.error, ValueError, UnicodeDecodeError) as e:
+            logger.warning('Index cache {} is corrupt: {}', self.path, e)
+            result = None
+
+        if result is None:
+            mm.close()
+        else:
+            self.close()
+            self._mmap = mm
+        return result
+
+    def _load(self, view: memoryview, key: tuple[int, int, int, int]):
+        (magic, version, size, mtime_ns, crc32, file_count,
+         n_string_count, paths_size, string_table_size, n_string_size) = _HEAD.unpack_from(view)
+        if magic != self.MAGIC or version != self.VERSION:
+            return None
+        if (size, mtime_ns, crc32, file_count) != key:
+            return None
+
+        expected = (_HEAD.size + (len(FileTree.columns) * file_count + n_string_count) * 4
+                    + paths_size + string_table_size + n_string_size)
+        if expected != len(view):
+            raise ValueError(f'size mismatch, expected {expected} bytes, got {len(view)}')
+
+        pos = _HEAD.size
+        tree = FileTree()
+        for name in FileTree.columns:
+            column, pos = _read_array(view, pos, file_count)
+            setattr(tree, name, column)
+
+        paths = str(view[pos:pos + paths_size], 'utf-8').split('\0') if file_count else []
+        if len(paths) != file_count:
+            raise ValueError('path count mismatch')
+        tree.set_paths(paths)
+        pos += paths_size
+
+        string_table = view[pos:pos + string_table_size]
+        pos += string_table_size
+
+        n_string_indexes, pos = _read_array(view, pos, n_string_count)
+        n_string_paths = str(view[pos:pos + n_string_size], 'utf-8').split('\0') if n_string_count else []
+        n_string = dict(zip(n_string_indexes, n_string_paths))
+
+        return tree, string_table, n_string
+
+    def save(self, key: tuple[int, int, int, int], tree: FileTree, string_table: bytes, n_string: dict[int, str]):
+        size, mtime_ns, crc32, file_count = key
+        paths = '\0'.join(tree.paths).encode('utf-8')
+        n_string_paths = '\0'.join(n_string.values()).encode('utf-8')
+
+        tmp = self.path.with_name(self.path.name + f'.{os.getpid()}.tmp')
+        try:
+            with tmp.open('wb') as f:
+                f.write(_HEAD.pack(self.MAGIC, self.VERSION, size, mtime_ns, crc32, file_count,
+                                   len(n_string), len(paths), len(string_table), len(n_string_paths)))
+                for name in FileTree.columns:
+                    _write_array(f, getattr(tree, name))
+                f.write(paths)
+                f.write(string_table)
+                _write_array(f, array('I', n_string.keys()))
+                f.write(n_string_paths)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            logger.warning('Index cache {} not saved: {}', self.path, e)
+            tmp.unlink(missing_ok=True)
+
+    def close(self):
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                # the string table still views the mapping.
+                pass
+            self._mmap = None
+
+
+def _read_array(view: memoryview, pos: int, count: int) -> tuple[array, int]:
+    column = array('I')
+    end = pos + count * column.itemsize
+    data = view[pos:end]
+    if len(data) != end - pos:
+        raise ValueError(f'array at {pos} truncated, expected {end - pos} bytes, got {len(data)}')
+    column.frombytes(data)
+    if sys.byteorder == 'big':
+        column.byteswap()
+    return column, end
+
+
+def _write_array(f, column: array):
+    if sys.byteorder == 'big':
+        column = array(column.typecode, column)
+        column.byteswap()
+    column.tofile(f)
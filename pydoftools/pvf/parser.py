@@ -1,24 +1,28 @@
-import dataclasses
 import struct
 import typing
-from collections import defaultdict
+from functools import partial
+from itertools import compress
+from types import MappingProxyType
 
 from loguru import logger
-from zhconv import convert
-
 from .enums import FieldType
 from .file_tree import StringTable
+from .text import TextConverter
 
 if typing.TYPE_CHECKING:
     from .reader import PvfReader
 
 
-@dataclasses.dataclass
-class FileContentField:
+class FileContentField(typing.NamedTuple):
     """文件原始内容解析的字段"""
     tp: int
     value: typing.Any
 
+    @classmethod
+    def many(cls, types: typing.Iterable[int], values: typing.Iterable) -> list['FileContentField']:
+        """按列批量创建, 跳过 __new__ 的参数处理"""
+        return list(map(partial(tuple.__new__, cls), zip(types, values)))
+
     def __str__(self):
         if self.tp == FieldType.KEY:
             return self.value
@@ -27,8 +31,7 @@ class FileContentField:
     __repr__ = __str__
 
 
-@dataclasses.dataclass
-class ReadableField:
+class ReadableField(typing.NamedTuple):
     key: str
     values: list[FileContentField]
     self_closing: bool = False
@@ -40,106 +43,140 @@ class ReadableField:
         return [f.value for f in self.values]
 
 
+class Section(typing.NamedTuple):
+    """段在原始字段数组中的位置, 值为 [start, key_pos) 和 (key_pos, end) 两段"""
+    key: str
+    start: int
+    key_pos: int
+    end: int
+    self_closing: bool
+
+    @property
+    def size(self) -> int:
+        return self.end - self.start - 1
+
+
+# translate table, 1 for key units.
+_KEY_UNITS = bytes(i == FieldType.KEY.value for i in range(256))
+
+
 class Parser:
+    """按段索引的文件内容, 只记录每段在字段数组中的位置, ReadableField 在访问时才创建"""
 
-    def __init__(self):
-        self.fields: dict[str, list[ReadableField]] = defaultdict(list)
-        self.origin: list[FileContentField] = []
+    def __init__(self, types: bytes = b'', values: list | None = None):
+        self.types = types
+        self.values: list = values if values is not None else []
+        self.index: typing.Mapping[str, tuple[Section, ...]] = MappingProxyType({})
+        self._origin: list[FileContentField] | None = None
+        self._fields: dict[str, list[ReadableField]] = {}
 
     @classmethod
     def parse(cls, c: bytes, pvf: 'PvfReader') -> 'Parser':
-        fields = pvf.parse_file_content(c)
-        parser = cls()
-        parser._parse(fields)
+        parser = cls(*pvf.decode_file_content(c))
+        parser._index()
         return parser
 
-    def _parse(self, fields: list[FileContentField]):
-        self.fields = defaultdict(list)
-        self.origin = fields
-        closing_key = set()
-        for f in fields:
-            if f.tp == FieldType.KEY.value and f.value.startswith('[/'):
-                closing_key.add(f.value[2:-1])
+    @property
+    def origin(self) -> list[FileContentField]:
+        if self._origin is None:
+            self._origin = FileContentField.many(self.types, self.values)
+        return self._origin
 
+    @origin.setter
+    def origin(self, fields: list[FileContentField]):
+        self._parse(fields)
+
+    @property
+    def fields(self) -> typing.Mapping[str, list[ReadableField]]:
+        return MappingProxyType({key: self.get_field(key) for key in self.index})
+
+    def _parse(self, fields: list[FileContentField]):
+        self.types = bytes(f.tp for f in fields)
+        self.values = [f.value for f in fields]
+        self._origin = fields
+        self._index()
+
+    def _index(self):
+        # only key units start or end a section, everything between them is a span.
+        values = self.values
+        key_indexes = list(compress(range(len(self.types)), self.types.translate(_KEY_UNITS)))
+        key_values = list(map(values.__getitem__, key_indexes))
+        closing_key = {v[2:-1] for v in key_values if v.startswith('[/')}
+
+        index: dict[str, list[Section]] = {}
         key: str | None = None
-        values = []
-        for f in fields:
-            if f.tp == FieldType.KEY.value:
-                if key is None:
-                    key = f.value[1:-1]
-                else:
-                    is_close = f.value.startswith('[/')
-                    if key in closing_key:
-                        if is_close and f.value[2:-1] == key:
-                            self.fields[key].append(ReadableField(
-                                key=key,
-                                values=values,
-                                self_closing=True
-                            ))
-                            values = []
-                            key = None
-                        else:
-                            values.append(f)
-                    else:
-                        self.fields[key].append(ReadableField(
-                            key=key,
-                            values=values,
-                        ))
-                        values = []
-                        if f.value.startswith('[/'):
-                            key = None
-                        else:
-                            key = f.value[1:-1]
+        start = key_pos = 0
+        for pos, v in zip(key_indexes, key_values):
+            if key is None:
+                key = v[1:-1]
+                key_pos = pos
+            elif key in closing_key:
+                if v.startswith('[/') and v[2:-1] == key:
+                    index.setdefault(key, []).append(Section(key, start, key_pos, pos, True))
+                    key = None
+                    start = pos + 1
             else:
-                values.append(f)
-
-    def __parse(self, fields: list[FileContentField]):
-        key: str = None
-        values: list[FileContentField] = None
-        for f in fields:
-            if f.tp == 5:
-                if f.value.startswith('[/'):
-                    self.fields[key].append(ReadableField(
-                        key=key,
-                        values=values,
-                        self_closing=True
-                    ))
+                index.setdefault(key, []).append(Section(key, start, key_pos, pos, False))
+                if v.startswith('[/'):
+                    key = None
+                    start = pos + 1
                 else:
-                    if key:
-                        self.fields[key].append(ReadableField(
-                            key=key,
-                            values=values,
-                        ))
-
-                    values = []
-                    key = f.value[1:-1]
-            elif key:
-                values.append(f)
-
-        if key:
-            self.fields[key].append(ReadableField(
-                key=key,
-                values=values,
-            ))
+                    key = v[1:-1]
+                    start = key_pos = pos
+
+        self.index = MappingProxyType({k: tuple(v) for k, v in index.items()})
+        self._fields = {}
+
+    def section_values(self, section: Section) -> list:
+        return self.values[section.start:section.key_pos] + self.values[section.key_pos + 1:section.end]
+
+    def section_fields(self, section: Section) -> list[FileContentField]:
+        if self._origin is not None:
+            origin = self._origin
+            return origin[section.start:section.key_pos] + origin[section.key_pos + 1:section.end]
+        types = self.types[section.start:section.key_pos] + self.types[section.key_pos + 1:section.end]
+        return FileContentField.many(types, self.section_values(section))
+
+    def children(self, section: Section) -> 'Parser':
+        """把段内的字段作为一个新的 Parser 解析, 用于嵌套的段"""
+        parser = Parser(self.types[section.start:section.key_pos] + self.types[section.key_pos + 1:section.end],
+                        self.section_values(section))
+        parser._index()
+        return parser
 
     def get_field(self, key: str) -> list[ReadableField]:
-        return self.fields[key]
+        fields = self._fields.get(key)
+        if fields is None:
+            sections = self.index.get(key)
+            if not sections:
+                return []
+            fields = self._fields[key] = [
+                ReadableField(key=key, values=self.section_fields(s), self_closing=s.self_closing)
+                for s in sections
+            ]
+        return fields
+
+    def _section_value(self, section: Section) -> list | int | str | float:
+        if section.size == 1:
+            i = section.start if section.start < section.key_pos else section.key_pos + 1
+            return self.values[i]
+        return self.section_values(section)
 
     def get_field_value(self, key: str) -> list[int | str | float] | None:
-        fields = self.get_field(key)
-        if not fields:
+        sections = self.index.get(key)
+        if not sections:
             return None
-        if len(fields) == 1:
-            return fields[0].value
-        return [f.value for f in fields]
+        if len(sections) == 1:
+            return self._section_value(sections[0])
+        return [self._section_value(s) for s in sections]
 
     def get_simple_field_value(self, key: str):
-        fields = self.get_field(key)
-        if not fields:
+        sections = self.index.get(key)
+        if not sections:
             return None
-        if len(fields) == 1:
-            return fields[0].value
-        return '\t'.join(str(f.value) for f in fields)
+        if len(sections) == 1:
+            return self._section_value(sections[0])
+        return '\t'.join(str(self._section_value(s)) for s in sections)
 
 
 class LstParser:
@@ -192,9 +229,12 @@ class StrParser:
         self.data = data
 
     @classmethod
-    def parser(cls, content: bytes, encode: str = 'big5') -> 'StrParser':
+    def parser(cls,
+               content: bytes,
+               encode: str = 'big5',
+               converter: TextConverter | None = None) -> 'StrParser':
         s = content.decode(encode, 'ignore')
-        c = convert(s, 'zh-cn')
+        c = (converter or TextConverter(encode=encode)).convert(s)
         data = {}
         for line in c.splitlines():
             if '>' not in line:
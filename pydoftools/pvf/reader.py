@@ -1,16 +1,42 @@
+import fnmatch
+import os
 import struct
 import typing
-from functools import lru_cache
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from itertools import compress
 from pathlib import Path
 from typing import BinaryIO
 
+import anyio
 from anyio import AsyncFile
 from loguru import logger
 
 from .file_tree import FileTreeNode, StringTable
+from .cache import ContentCache, LRUCache, default_content_cache
 from .header import PvfHeader
+from .index_cache import PvfIndexCache
 from .utils import decrypt_bytes
 from .parser import FileContentField, LstParser, StrParser
+from .text import TextConverter
+
+
+def _unit_mask(*unit_types: int) -> bytes:
+    # translate table, unit type -> 1 if selected else 0.
+    return bytes(i in unit_types for i in range(256))
+
+
+# struct code per unit type, floats are the only non-int values.
+_UNIT_CODES = bytes(b'f'[0] if i == 4 else b'i'[0] for i in range(256))
+_STRING_UNITS = _unit_mask(5, 6, 8)
+_QUOTE_UNITS = _unit_mask(7)
+_STR_FILE_UNITS = _unit_mask(9)
+_KNOWN_UNITS = _unit_mask(2, 3, 4, 5, 6, 7, 8, 9)
+
+
+def _assign(target: list, indexes: typing.Iterable[int], values: typing.Iterable):
+    # target[i] = v for each pair, looped in c.
+    deque(map(target.__setitem__, indexes, values), maxlen=0)
 
 
 def fake_tqdm(g: typing.Iterable, **kwargs):
@@ -23,16 +49,33 @@ class PvfReader:
                  path: Path,
                  encode: str = 'big5',
                  lazy: bool = True,
-                 use_tqdm=False):
+                 use_tqdm=False,
+                 index_cache: bool | Path = False,
+                 locale: str | None = 'zh-cn',
+                 conversion_cache: Path | None = None,
+                 str_cache_size: int | None = 256,
+                 content_cache: ContentCache | None = default_content_cache):
         self.path = path
         self.header = PvfHeader(path)
         self.lazy = lazy
+        # sidecar index cache, True for `<pvf>.idx` or a custom path.
+        self.index_cache: PvfIndexCache | None = None
+        if index_cache is True:
+            self.index_cache = PvfIndexCache.sidecar(path)
+        elif index_cache:
+            self.index_cache = PvfIndexCache(index_cache)
         self._fp: BinaryIO | AsyncFile | None = None
         self._fp_start = 0
         self._file_data = b''
         self.encode = encode
+        # text conversion target, None keeps traditional chinese.
+        self.converter = TextConverter(locale, encode, cache_path=conversion_cache)
+        # decrypted file contents, shared by all readers unless given one, None disables it.
+        self.content_cache = content_cache
+        # parsed .str files referenced by type 9 units, None for no limit.
+        self.str_cache: LRUCache[str, StrParser] = LRUCache(str_cache_size)
 
-        self.files_map: dict[str, FileTreeNode] = {}
+        self.files_map: typing.Mapping[str, FileTreeNode] = {}
         self.string_table: StringTable = None
         self.n_string: LstParser = None
         self.tqdm = fake_tqdm
@@ -45,42 +88,106 @@ class PvfReader:
 
     def read(self):
         logger.info(f'Reading PVF {self.path}...')
-        self._fp, self._fp_start = self.header.read()
-        self.load_file_tree()
-        self.load_string_table()
-        self.load_n_string()
+        self._fp, self._fp_start = self.header.read(load_tree=self.index_cache is None)
+        if self.index_cache is None:
+            self.load_file_tree()
+            self.load_string_table()
+            self.load_n_string()
+        elif not self.load_index_cache():
+            self.header.read_tree(self._fp)
+            self.load_file_tree()
+            self.load_string_table()
+            self.load_n_string()
+            self.save_index_cache()
         if not self.lazy:
             self._fp.seek(self._fp_start)
             self._file_data = self._fp.read()
 
+    def _index_cache_key(self) -> tuple[int, int, int, int]:
+        return PvfIndexCache.make_key(self.path, self.header.dir_tree_crc32, self.header.file_count)
+
+    def load_index_cache(self) -> bool:
+        cached = self.index_cache.load(self._index_cache_key())
+        if cached is None:
+            logger.info('Index cache {} missing or stale, rebuilding.', self.index_cache.path)
+            return False
+
+        self.files_map, string_table, n_string = cached
+        self._set_string_table(string_table)
+        self.n_string = LstParser(n_string, self.encode)
+        logger.info('Index cache loaded. {} files found.', len(self.files_map))
+        return True
+
+    def save_index_cache(self):
+        self.index_cache.save(self._index_cache_key(), self.files_map, self.string_table.raw, self.n_string.data)
+
     def load_file_tree(self):
         logger.info('Loading file tree...')
-        for f in self.tqdm(self.header.load_file_tree(), total=self.header.file_count):
-            self.files_map[f.file_path] = f
+        self.files_map = self.header.parse_file_tree()
         logger.info('File tree loaded. {} files found.', len(self.files_map))
 
     def load_string_table(self):
         logger.info('Loading string table...')
-        b = self.read_file_content('stringtable.bin')
-        self.string_table = StringTable(b, self.encode)
+        b = self.read_file_content('stringtable.bin', cache=False)
+        self._set_string_table(b)
         logger.info('String table loaded. {} strings found.', len(self.string_table))
 
+    def _set_string_table(self, content: bytes):
+        self.string_table = StringTable(content, self.encode, converter=self.converter)
+        if self.converter.cache_path is not None:
+            # precompute every string once, later starts hit the conversion cache.
+            self.string_table.decode_all()
+            self.converter.save()
+
     def load_n_string(self):
         logger.info('Loading n string ...')
-        c = self.read_file_content('n_string.lst')
+        c = self.read_file_content('n_string.lst', cache=False)
         self.n_string = LstParser.parse(c, self.string_table, self.encode)
         logger.info('NString loaded.')
 
-    @lru_cache(maxsize=50)
-    def read_file_content(self, path: str) -> bytes:
+    def read_file_content(self, path: str, cache: bool = True) -> bytes:
+        file, key = self._locate(path)
+        content = self._cached(key) if cache else None
+        if content is None:
+            content = decrypt_bytes(self._read_bytes(file.relative_offset, file.file_length), file.file_crc32)
+            if cache:
+                self._cache_put(key, content)
+        return content
+
+    def read_fields(self, path: str) -> list[FileContentField]:
+        """读取并解析文件, content_cache.cache_parsed 为 True 时缓存解析结果"""
+        key = self._parsed_key(path)
+        fields = self._cached(key)
+        if fields is None:
+            fields = self.parse_file_content(self.read_file_content(path))
+            self._cache_put(key, fields, len(fields) * ContentCache.FIELD_SIZE)
+        # callers may modify the list, keep the cached one intact.
+        return list(fields)
+
+    def _locate(self, path: str) -> tuple[FileTreeNode, tuple]:
         path = path.lower().replace('\\', '/')
         path.removeprefix('/')
         file = self.files_map.get(path)
         if file is None:
             raise FileNotFoundError(f'File {path} not found in PVF {self.path}')
+        return file, (str(self.path), self.header.dir_tree_crc32, 'raw', path)
+
+    def _parsed_key(self, path: str) -> tuple | None:
+        if self.content_cache is None or not self.content_cache.cache_parsed:
+            return None
+        # the text depends on how the reader decodes and converts it.
+        return (str(self.path), self.header.dir_tree_crc32, 'parsed', path.lower().replace('\\', '/'),
+                self.converter.locale, self.encode)
 
-        content = self._read_bytes(file.relative_offset, file.file_length)
-        return decrypt_bytes(content, file.file_crc32)
+    def _cached(self, key: tuple | None):
+        if self.content_cache is None or key is None:
+            return None
+        return self.content_cache.get(key)
+
+    def _cache_put(self, key: tuple | None, value, size: int | None = None):
+        if self.content_cache is None or key is None:
+            return
+        self.content_cache.put(key, value, len(value) if size is None else size)
 
     def _read_bytes(self, start: int, length: int) -> bytes:
         if self._fp is None:
@@ -88,60 +195,114 @@ class PvfReader:
         self._fp.seek(self._fp_start + start)
         return self._fp.read(length)
 
+    def read_str(self, path: str) -> StrParser:
+        """读取并解析 .str 文件, 结果按路径缓存"""
+        return self.str_cache.get_or_load(path.lower().replace('\\', '/'), self._load_str)
+
+    def _load_str(self, path: str) -> StrParser:
+        return StrParser.parser(self.read_file_content(path, cache=False), self.encode, self.converter)
+
+    def str_paths(self, c: bytes) -> set[str]:
+        """文件内容中 type 9 字段引用的 .str 路径"""
+        end = 2 + 5 * ((len(c) - 2) // 5)
+        types = c[2:end:5]
+        return {self.n_string[struct.unpack_from('<i', c, 3 + 5 * i)[0]].lower().replace('\\', '/')
+                for i in compress(range(len(types)), types.translate(_STR_FILE_UNITS))}
+
+    def preload_str(self, paths: typing.Iterable[str]) -> int:
+        """一次读入 paths 中所有文件引用的 .str, 按在 pvf 中的位置顺序读取, 返回新加载的数量"""
+        needed = set()
+        for path in paths:
+            needed |= self.str_paths(self.read_file_content(path))
+        missing = sorted((p for p in needed if p not in self.str_cache), key=self._file_offset)
+        maxsize = self.str_cache.maxsize
+        if maxsize is not None and len(needed) > maxsize:
+            logger.warning('{} .str files needed but str_cache_size is {}, some will be evicted.',
+                           len(needed), maxsize)
+        for p in self.tqdm(missing, desc='Loading str'):
+            self.str_cache.put(p, self._load_str(p))
+        return len(missing)
+
+    def _file_offset(self, path: str) -> int:
+        file = self.files_map.get(path)
+        return file.relative_offset if file is not None else 0
+
     def parse_file_content(self,
                            c: bytes,
-                           string_quote: str = '') -> list[FileContentField]:
-        shift = 2
+                           string_quote: str = '',
+                           strs: typing.Mapping[str, StrParser] | None = None) -> list[FileContentField]:
+        types, values = self.decode_file_content(c, string_quote, strs)
+        return FileContentField.many(types, values)
+
+    def decode_file_content(self,
+                            c: bytes,
+                            string_quote: str = '',
+                            strs: typing.Mapping[str, StrParser] | None = None) -> tuple[bytes, list]:
+        """解析文件内容为类型和值两列, 不创建 FileContentField.
+
+        strs 为已加载的 .str (路径: StrParser), 为 None 时通过 read_str 读取.
+        """
         unit_num = (len(c) - 2) // 5
-        struct_pattern = '<'
-        unit_types = []
-        for i in range(unit_num):
-            unit_type = c[i * 5 + shift]
-            unit_types.append(unit_type)
-            if unit_type == 4:
-                struct_pattern += 'Bf'
-            else:
-                struct_pattern += 'Bi'
-
-        units = struct.unpack(struct_pattern, c[2:2 + 5 * unit_num])
-        types = units[::2]
-        values = units[1::2]
-        fields = []
-        for i in range(unit_num):
-            match types[i]:
-                case 2 | 3 | 4:
-                    fields.append(FileContentField(types[i], values[i]))
-                case 5 | 6 | 8:
-                    fields.append(FileContentField(types[i], self.string_table[values[i]]))
-                case 7:
-                    fields.append(FileContentField(
-                        types[i],
-                        string_quote + self.string_table[values[i]] + string_quote
-                    ))
-                case 9:
-                    p = self.n_string[values[i]].lower()
-                    str_c = self.read_file_content(p)
-                    parser = StrParser.parser(str_c, self.encode)
-                    v = parser[self.string_table[values[i+1]]]
-                    fields.append(FileContentField(types[i], v))
-
-        return fields
+        end = 2 + 5 * unit_num
+        types = c[2:end:5]
+        # one pad byte for the type and one value code per unit.
+        pattern = bytearray(2 * len(types))
+        pattern[::2] = b'x' * len(types)
+        pattern[1::2] = types.translate(_UNIT_CODES)
+        values = list(struct.unpack(b'<' + pattern, c[2:end]))
+        indexes = range(len(types))
+
+        # string file values take the next unit's raw id as key.
+        for i in compress(indexes, types.translate(_STR_FILE_UNITS)):
+            str_path = self.n_string[values[i]].lower().replace('\\', '/')
+            parser = strs[str_path] if strs is not None else self.read_str(str_path)
+            values[i] = parser[self.string_table[values[i + 1]]]
+
+        # resolve each distinct string id once.
+        string_indexes = list(compress(indexes, types.translate(_STRING_UNITS)))
+        quote_indexes = list(compress(indexes, types.translate(_QUOTE_UNITS)))
+        if string_indexes or quote_indexes:
+            ids = set(map(values.__getitem__, string_indexes))
+            ids.update(map(values.__getitem__, quote_indexes))
+            strings = dict(zip(ids, map(self.string_table.__getitem__, ids)))
+            _assign(values, string_indexes, map(strings.__getitem__, map(values.__getitem__, string_indexes)))
+            _assign(values, quote_indexes, [string_quote + strings[values[i]] + string_quote for i in quote_indexes])
+
+        # unknown unit types are dropped.
+        known = types.translate(_KNOWN_UNITS)
+        if 0 in known:
+            types = bytes(compress(types, known))
+            values = list(compress(values, known))
+
+        return types, values
 
 
 class AsyncPvfReader(PvfReader):
+    # raw descriptor for positional reads, opened by read_many before any worker runs.
+    _fd: int | None = None
 
     async def read(self):
         logger.info(f'Async Reading PVF {self.path}...')
-        self._fp, self._fp_start = await self.header.aread()
-        self.load_file_tree()
-        await self.load_string_table()
-        await self.load_n_string()
+        self._fp, self._fp_start = await self.header.aread(load_tree=self.index_cache is None)
+        if self.index_cache is None:
+            self.load_file_tree()
+            await self.load_string_table()
+            await self.load_n_string()
+        elif not self.load_index_cache():
+            await self.header.aread_tree(self._fp)
+            self.load_file_tree()
+            await self.load_string_table()
+            await self.load_n_string()
+            self.save_index_cache()
         if not self.lazy:
             await self._fp.seek(self._fp_start)
             self._file_data = await self._fp.read()
 
     async def close(self):
         await self._fp.aclose()
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
 
     async def __aenter__(self):
         await self.read()
@@ -156,24 +317,114 @@ class AsyncPvfReader(PvfReader):
         await self._fp.seek(self._fp_start + start)
         return await self._fp.read(length)
 
-    async def read_file_content(self, path: str) -> bytes:
-        path = path.lower().replace('\\', '/')
-        path.removeprefix('/')
-        file = self.files_map.get(path)
-        if file is None:
-            raise FileNotFoundError(f'File {path} not found in PVF {self.path}')
+    async def read_file_content(self, path: str, cache: bool = True) -> bytes:
+        file, key = self._locate(path)
+        content = self._cached(key) if cache else None
+        if content is None:
+            content = await self._read_bytes(file.relative_offset, file.file_length)
+            content = decrypt_bytes(content, file.file_crc32)
+            if cache:
+                self._cache_put(key, content)
+        return content
+
+    async def read_many(self,
+                        paths: typing.Iterable[str],
+                        concurrency: int = 16) -> typing.AsyncGenerator[tuple[str, bytes], None]:
+        """并发读取多个文件, 按完成顺序产出 (path, content).
+
+        使用按位置读取, 不共享文件指针, 读取和解密在线程池中进行, 最多 concurrency 个同时进行.
+        """
+        self._open_fd()
+        executor = ThreadPoolExecutor(concurrency)
+        pending = set()
+        paths = iter(paths)
+        try:
+            while True:
+                for path in paths:
+                    file, key = self._locate(path)
+                    content = self._cached(key)
+                    if content is not None:
+                        yield path, content
+                        continue
+                    pending.add(executor.submit(self._read_decrypt, path, file, key))
+                    if len(pending) >= concurrency:
+                        break
+                if not pending:
+                    break
+                done, pending = await anyio.to_thread.run_sync(wait, pending, None, FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    async def aiter_files(self,
+                          pattern: str,
+                          concurrency: int = 16) -> typing.AsyncGenerator[tuple[str, bytes], None]:
+        """按 glob 匹配路径并发读取, 按在 pvf 中的位置提交"""
+        paths = sorted(fnmatch.filter(self.files_map, pattern.lower().replace('\\', '/')), key=self._file_offset)
+        async for item in self.read_many(paths, concurrency):
+            yield item
+
+    def _read_decrypt(self, path: str, file: FileTreeNode, key: tuple) -> tuple[str, bytes]:
+        content = decrypt_bytes(self._pread(file.relative_offset, file.file_length), file.file_crc32)
+        self._cache_put(key, content)
+        return path, content
+
+    def _open_fd(self):
+        # called from the event loop thread only, the workers never open it themselves.
+        if self._fp is None:
+            raise RuntimeError('File not opened.')
+        if self._fd is None and hasattr(os, 'pread'):
+            self._fd = os.open(self.path, os.O_RDONLY)
+
+    def _pread(self, start: int, length: int) -> bytes:
+        if self._fd is None:
+            # no positional read, every call gets its own handle.
+            with self.path.open('rb') as f:
+                f.seek(self._fp_start + start)
+                return f.read(length)
+        return os.pread(self._fd, length, self._fp_start + start)
+
+    async def read_fields(self, path: str) -> list[FileContentField]:
+        key = self._parsed_key(path)
+        fields = self._cached(key)
+        if fields is None:
+            c = await self.read_file_content(path)
+            # parse_file_content is sync, load the .str files it needs first.
+            strs = await self._load_strs(self.str_paths(c))
+            fields = self.parse_file_content(c, strs=strs)
+            self._cache_put(key, fields, len(fields) * ContentCache.FIELD_SIZE)
+        return list(fields)
+
+    async def preload_str(self, paths: typing.Iterable[str]) -> int:
+        needed = set()
+        for path in paths:
+            needed |= self.str_paths(await self.read_file_content(path))
+        missing = sum(p not in self.str_cache for p in needed)
+        await self._load_strs(needed)
+        return missing
+
+    async def _load_strs(self, paths: set[str]) -> dict[str, StrParser]:
+        """读取 paths 中的 .str, 返回 路径: StrParser, 不依赖 str_cache 能否全部保留"""
+        strs = {p: self.str_cache.get(p) for p in paths}
+        for p in sorted((p for p, parser in strs.items() if parser is None), key=self._file_offset):
+            c = await self.read_file_content(p, cache=False)
+            strs[p] = StrParser.parser(c, self.encode, self.converter)
+            self.str_cache.put(p, strs[p])
+        return strs
 
-        content = await self._read_bytes(file.relative_offset, file.file_length)
-        return decrypt_bytes(content, file.file_crc32)
+    def _load_str(self, path: str) -> StrParser:
+        # the sync loader would read through the async read_file_content.
+        raise RuntimeError(f'{path} is not loaded, pass strs from _load_strs or use await read_fields.')
 
     async def load_string_table(self):
         logger.info('Loading string table...')
-        b = await self.read_file_content('stringtable.bin')
-        self.string_table = StringTable(b, self.encode)
+        b = await self.read_file_content('stringtable.bin', cache=False)
+        self._set_string_table(b)
         logger.info('String table loaded. {} strings found.', len(self.string_table))
 
     async def load_n_string(self):
         logger.info('Loading n string ...')
-        c = await self.read_file_content('n_string.lst')
+        c = await self.read_file_content('n_string.lst', cache=False)
         self.n_string = LstParser.parse(c, self.string_table, self.encode)
         logger.info('NString loaded.')
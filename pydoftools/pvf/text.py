@@ -0,0 +1,136 @@
+import os
+import struct
+from pathlib import Path
+
+from loguru import logger
+from zhconv import convert
+
+_U32 = struct.Struct('<I')
+
+
+class TextConverter:
+    """pvf 文本的解码和繁简转换.
+
+    locale 为 None 时只解码不转换, 可选 'zh-cn', 'zh-tw' 等 zhconv 支持的地区.
+    开启 cache 后以原始字节为键缓存转换结果, cache_path 存在时从磁盘加载, save 写回.
+    """
+
+    MAGIC = b'PYDOFZH1'
+
+    def __init__(self,
+                 locale: str | None = 'zh-cn',
+                 encode: str = 'big5',
+                 cache: bool = False,
+                 cache_path: Path | None = None):
+        self.locale = locale
+        self.encode = encode
+        self.cache_path = Path(cache_path) if cache_path else None
+        self.cached: dict[bytes, str] | None = {} if cache or cache_path else None
+        self._dirty = False
+        if self.cache_path is not None:
+            self.load()
+
+    def convert(self, s: str) -> str:
+        # zhconv has no pure-ascii entries, ascii text never changes.
+        if self.locale is None or s.isascii():
+            return s
+        return convert(s, self.locale)
+
+    def convert_many(self, strings: list[str]) -> list[str]:
+        """一次 zhconv 调用转换多个字符串"""
+        result = list(strings)
+        if self.locale is None:
+            return result
+
+        indexes = [i for i, s in enumerate(strings) if not s.isascii()]
+        if not indexes:
+            return result
+
+        texts = [strings[i] for i in indexes]
+        if any('\0' in s for s in texts):
+            converted = [convert(s, self.locale) for s in texts]
+        else:
+            # the separator never takes part in a dictionary match.
+            converted = convert('\0'.join(texts), self.locale).split('\0')
+
+        for i, s in zip(indexes, converted):
+            result[i] = s
+        return result
+
+    def decode(self, raw: bytes) -> str:
+        if self.cached is None:
+            return self.convert(str(raw, self.encode, 'ignore'))
+
+        raw = bytes(raw)
+        value = self.cached.get(raw)
+        if value is None:
+            value = self.cached[raw] = self.convert(str(raw, self.encode, 'ignore'))
+            self._dirty = True
+        return value
+
+    def decode_many(self, raws: list[bytes]) -> list[str]:
+        if self.cached is None:
+            return self.convert_many([str(raw, self.encode, 'ignore') for raw in raws])
+
+        raws = [bytes(raw) for raw in raws]
+        result = [self.cached.get(raw) for raw in raws]
+        missing = [i for i, value in enumerate(result) if value is None]
+        if missing:
+            converted = self.convert_many([str(raws[i], self.encode, 'ignore') for i in missing])
+            for i, value in zip(missing, converted):
+                result[i] = self.cached[raws[i]] = value
+            self._dirty = True
+        return result
+
+    def _cache_header(self) -> bytes:
+        return self.MAGIC + f'{self.locale}|{self.encode}'.encode('ascii') + b'\n'
+
+    def load(self) -> bool:
+        try:
+            data = self.cache_path.read_bytes()
+        except OSError:
+            return False
+
+        header = self._cache_header()
+        if not data.startswith(header):
+            logger.info('Conversion cache {} does not match {}, ignored.', self.cache_path, header[8:-1])
+            return False
+
+        try:
+            cached = {}
+            view = memoryview(data)
+            pos = len(header)
+            count, = _U32.unpack_from(view, pos)
+            pos += 4
+            for _ in range(count):
+                size, = _U32.unpack_from(view, pos)
+                raw = bytes(view[pos + 4:pos + 4 + size])
+                pos += 4 + size
+                size, = _U32.unpack_from(view, pos)
+                cached[raw] = str(view[pos + 4:pos + 4 + size], 'utf-8')
+                pos += 4 + size
+        except (struct.error, UnicodeDecodeError) as e:
+            logger.warning('Conversion cache {} is corrupt: {}', self.cache_path, e)
+            return False
+
+        cached.update(self.cached)
+        self.cached = cached
+        return True
+
+    def save(self):
+        if self.cache_path is None or not self._dirty:
+            return
+
+        chunks = [self._cache_header(), _U32.pack(len(self.cached))]
+        for raw, value in self.cached.items():
+            value = value.encode('utf-8')
+            chunks += [_U32.pack(len(raw)), raw, _U32.pack(len(value)), value]
+
+        tmp = self.cache_path.with_name(self.cache_path.name + f'.{os.getpid()}.tmp')
+        try:
+            tmp.write_bytes(b''.join(chunks))
+            os.replace(tmp, self.cache_path)
+            self._dirty = False
+        except OSError as e:
+            logger.warning('Conversion cache {} not saved: {}', self.cache_path, e)
+            tmp.unlink(missing_ok=True)
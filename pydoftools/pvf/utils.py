@@ -1,15 +1,65 @@
+import functools
+import typing
+
+DECRYPT_KEY = 0x81A79011
+# bytes decrypted per step, must be a multiple of 4.
+DECRYPT_CHUNK_SIZE = 1 << 16
+
+
 def decrypt_bytes(data: bytes, crc: int) -> bytes:
     """对原始字节流进行初步解密"""
-    key = 0x81A79011
-    xor = crc ^ key
-    int_num = len(data) // 4
-    key_all = xor.to_bytes(4, 'little') * int_num
-    value_xored_all = int.from_bytes(key_all, 'little') ^ int.from_bytes(data, 'little')
+    return b''.join(iter_decrypt(data, crc))
+
+
+def decrypt_into(data: bytes, crc: int, out: bytearray | memoryview = None,
+                 chunk_size: int = DECRYPT_CHUNK_SIZE) -> int:
+    """解密到 out 中, 返回写入的字节数. out 为空时原地解密 data (需可写)"""
+    view = memoryview(data)
+    out = view if out is None else memoryview(out)
+    size = len(view) // 4 * 4
+    if len(out) < size:
+        raise ValueError(f'Output buffer too small: {len(out)} < {size}')
+
+    start = 0
+    for chunk in iter_decrypt(view, crc, chunk_size):
+        end = start + len(chunk)
+        out[start:end] = chunk
+        start = end
+
+    return size
+
+
+def iter_decrypt(data: bytes, crc: int,
+                 chunk_size: int = DECRYPT_CHUNK_SIZE) -> typing.Generator[bytes, None, None]:
+    """按块解密, 额外内存只与块大小相关, 末尾不足 4 字节的部分被丢弃"""
+    xor = crc ^ DECRYPT_KEY
+    chunk_size -= chunk_size % 4
+    view = memoryview(data)
+    size = len(view) // 4 * 4
+    for start in range(0, size, chunk_size):
+        chunk = view[start:min(start + chunk_size, size)]
+        yield _decrypt_chunk(chunk, xor)
+
+
+def _decrypt_chunk(chunk: memoryview, xor: int) -> bytes:
+    # every 32-bit word: (word ^ xor) rotated right by 6 bits.
+    length = len(chunk)
+    mask1, mask2 = _masks(length)
+    value = int.from_bytes(chunk, 'little') ^ _keys(xor, length)
+    value = (value & mask1) << 26 | (value & mask2) >> 6
+    return value.to_bytes(length, 'little')
+
+
+@functools.lru_cache(maxsize=8)
+def _masks(length: int) -> tuple[int, int]:
+    int_num = length // 4
     mask1 = 0b00000000_00000000_00000000_00111111
     mask2 = 0b11111111_11111111_11111111_11000000
     mask1_all = int.from_bytes(mask1.to_bytes(4, 'little') * int_num, 'little')
     mask2_all = int.from_bytes(mask2.to_bytes(4, 'little') * int_num, 'little')
-    value1 = value_xored_all & mask1_all
-    value2 = value_xored_all & mask2_all
-    value = value1 << 26 | value2 >> 6
-    return value.to_bytes(4 * int_num, 'little')
+    return mask1_all, mask2_all
+
+
+@functools.lru_cache(maxsize=8)
+def _keys(xor: int, length: int) -> int:
+    return int.from_bytes(xor.to_bytes(4, 'little') * (length // 4), 'little')
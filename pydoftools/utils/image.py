@@ -23,3 +23,16 @@ def load_raw(data: bytes, w: int, h: int, rotate=0) -> Image:
         image = image.transpose(Image.ROTATE_90)
 
     return image
+
+
+def crop_raw(data: bytes, w: int, box: tuple[int, int, int, int], ps=4) -> bytes:
+    left, top, right, bottom = box
+    stride = w * ps
+    view = memoryview(data)
+
+    if left == 0 and right == w:
+        return bytes(view[top * stride:bottom * stride])
+
+    start, end = left * ps, right * ps
+    rows = range(top * stride, bottom * stride, stride)
+    return b''.join([view[o + start:o + end] for o in rows])
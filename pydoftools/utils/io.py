@@ -1,5 +1,6 @@
 import struct
 import typing
+from io import SEEK_CUR, SEEK_END, SEEK_SET
 
 from .zlib import zfill_bytes
 
@@ -44,3 +45,43 @@ def write_struct(io: typing.IO, fmt, *values):
 def write_ascii_string(io: typing.IO, content: str):
     data = content.encode('ascii') + b'\x00'
     return io.write(data)
+
+
+class MemoryIO:
+    """只读的内存流, read 返回原缓冲区的 memoryview 切片而不复制"""
+
+    def __init__(self, data):
+        self._view = memoryview(data)
+        self._pos = 0
+
+    def read(self, size=-1) -> memoryview:
+        start = self._pos
+        end = len(self._view) if size is None or size < 0 else min(start + size, len(self._view))
+        end = max(start, end)
+        self._pos = end
+        return self._view[start:end]
+
+    def seek(self, offset: int, whence=SEEK_SET) -> int:
+        if whence == SEEK_CUR:
+            offset += self._pos
+        elif whence == SEEK_END:
+            offset += len(self._view)
+        if offset < 0:
+            raise ValueError(f'negative seek position {offset}')
+        self._pos = offset
+        return offset
+
+    def tell(self) -> int:
+        return self._pos
+
+    def getbuffer(self) -> memoryview:
+        return self._view
+
+    def close(self):
+        self._view.release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -1,21 +1,78 @@
 import zlib
 
+# wbits for streams stored without the 2 byte zlib header.
+RAW_DEFLATE_WBITS = -zlib.MAX_WBITS
+# deflate never expands a stream by more than this, larger size hints come from corrupt headers.
+MAX_DEFLATE_RATIO = 1032
+
+
+class ZlibDecompressError(zlib.error):
+    pass
+
 
 def zfill_bytes(data: bytes, size: int) -> bytes:
     fill_size = size - len(data)
     if fill_size > 0:
-        data += b'\x00' * fill_size
+        data = bytes(data) + b'\x00' * fill_size
     return data
 
 
-def zlib_decompress(data: bytes) -> bytes:
-    if data.startswith(b'\x78'):
-        data = zlib.decompress(data)
-    else:
-        header_index = data.rfind(b'\x78')
+def has_zlib_header(data: bytes) -> bool:
+    """前两个字节是否为合法的 zlib 头 (deflate, 窗口不超过 32K, 校验位正确)"""
+    if len(data) < 2:
+        return False
+    cmf, flg = data[0], data[1]
+    return cmf & 0x0f == 8 and cmf >> 4 <= 7 and (cmf << 8 | flg) % 31 == 0
+
+
+def zlib_decompress(data: bytes, size: int = 0, strict=False) -> bytes:
+    """解压 zlib 数据, 没有 zlib 头的按 raw deflate 解压.
+
+    size 为预期的解压大小, 用于一次分配好结果, 超过 deflate 最大压缩比的部分不预分配;
+    strict 为 True 时大小不符会报错. 数据损坏或不完整时抛出 ZlibDecompressError.
+    """
+    wbits = zlib.MAX_WBITS if has_zlib_header(data) else RAW_DEFLATE_WBITS
+    limit = len(data) * MAX_DEFLATE_RATIO
+    if strict and size > limit:
+        raise ZlibDecompressError(f'{_describe(data, wbits)}: expected {size} bytes, '
+                                  f'more than {limit} it can expand to')
+    try:
+        result = zlib.decompress(data, wbits, min(size, limit) or zlib.DEF_BUF_SIZE)
+    except zlib.error as e:
+        raise ZlibDecompressError(f'{_describe(data, wbits)}: {e}') from None
+
+    if strict and len(result) != size:
+        raise ZlibDecompressError(f'{_describe(data, wbits)}: got {len(result)} bytes, expected {size}')
+    return result
+
+
+def zlib_decompress_into(data: bytes, out: bytearray | memoryview) -> int:
+    """解压到调用方的缓冲区, 返回写入的字节数, 不会额外分配完整大小的结果.
+
+    解压结果超出缓冲区或数据不完整时抛出 ZlibDecompressError.
+    """
+    wbits = zlib.MAX_WBITS if has_zlib_header(data) else RAW_DEFLATE_WBITS
+    out = memoryview(out).cast('B')
+    d = zlib.decompressobj(wbits)
+    pos = 0
+    tail = data
+    while not d.eof:
         try:
-            data = zlib.decompress(data[header_index:] + data)
-        except zlib.error:
-            data = zlib.decompress(data[header_index:header_index + 2] + data)
+            # ask for one byte more than fits, any output beyond out is an overflow.
+            chunk = d.decompress(tail, len(out) - pos + 1)
+        except zlib.error as e:
+            raise ZlibDecompressError(f'{_describe(data, wbits)}: {e}') from None
+        if not chunk and not d.eof:
+            raise ZlibDecompressError(f'{_describe(data, wbits)}: incomplete or truncated stream')
+        if pos + len(chunk) > len(out):
+            raise ZlibDecompressError(f'{_describe(data, wbits)}: output larger than buffer of {len(out)} bytes')
+        out[pos:pos + len(chunk)] = chunk
+        pos += len(chunk)
+        tail = d.unconsumed_tail
 
-    return data
+    return pos
+
+
+def _describe(data: bytes, wbits: int) -> str:
+    kind = 'zlib' if wbits > 0 else 'raw deflate'
+    return f'Bad {kind} stream of {len(data)} bytes (starts with {bytes(data[:4]).hex()})'
@@ -0,0 +1,87 @@
+import random
+
+import pytest
+
+from pydoftools.npk.consts import IMAGE_FORMAT_1555, IMAGE_FORMAT_4444, IMAGE_FORMAT_8888
+from pydoftools.npk.img.image.format.color import Color
+from pydoftools.npk.img.image.format.convertor import FormatConvertor
+
+# every two byte pixel, v1 then v2.
+ALL_PIXELS = bytes(b for v in range(65536) for b in (v & 0xff, v >> 8))
+
+
+def random_rgba(count: int, seed=0) -> bytes:
+    return random.Random(seed).randbytes(count * 4)
+
+
+def per_pixel_from(decode, data: bytes) -> bytes:
+    return bytes(c for i in range(0, len(data), 2) for c in decode(data[i], data[i + 1]))
+
+
+def per_pixel_to(encode, data: bytes) -> bytes:
+    return bytes(v for i in range(0, len(data), 4) for v in encode(*data[i:i + 4]))
+
+
+@pytest.mark.parametrize('bulk, decode', [
+    (Color.from_1555_bulk, Color.from_1555),
+    (Color.from_4444_bulk, Color.from_4444),
+])
+def test_from_bulk_all_pixels(bulk, decode):
+    assert bulk(ALL_PIXELS) == per_pixel_from(decode, ALL_PIXELS)
+
+
+@pytest.mark.parametrize('bulk, encode, decode', [
+    (Color.to_1555_bulk, Color.to_1555, Color.from_1555),
+    (Color.to_4444_bulk, Color.to_4444, Color.from_4444),
+])
+def test_to_bulk(bulk, encode, decode):
+    # every color the format can hold, then arbitrary rgba.
+    decoded = per_pixel_from(decode, ALL_PIXELS)
+    assert bulk(decoded) == per_pixel_to(encode, decoded)
+    rgba = random_rgba(65536)
+    assert bulk(rgba) == per_pixel_to(encode, rgba)
+
+
+@pytest.mark.parametrize('bulk, decode', [
+    (Color.to_1555_bulk, Color.from_1555_bulk),
+    (Color.to_4444_bulk, Color.from_4444_bulk),
+])
+def test_round_trip_all_pixels(bulk, decode):
+    # 1555 has one unused bit per pixel, a decode always drops it.
+    once = decode(ALL_PIXELS)
+    assert decode(bulk(once)) == once
+
+
+def test_8888_bulk():
+    bgra = random_rgba(4096)
+    rgba = Color.from_8888_bulk(bgra)
+    assert rgba == bytes(c for i in range(0, len(bgra), 4) for c in (bgra[i + 2], bgra[i + 1], bgra[i], bgra[i + 3]))
+    assert Color.to_8888_bulk(rgba) == bgra
+
+
+def test_from_indexes_bulk():
+    colors = [tuple(random.Random(i).randbytes(4)) for i in range(200)]
+    indexes = bytes(range(256)) * 4
+    expected = bytes(c for i in indexes for c in (colors[i] if i < len(colors) else (0, 0, 0, 0)))
+    assert Color.from_indexes_bulk(indexes, Color.palette_tables(colors)) == expected
+    assert FormatConvertor.to_raw_indexes(indexes, colors) == expected
+
+
+@pytest.mark.parametrize('image_format, decode, encode', [
+    (IMAGE_FORMAT_1555, Color.from_1555, Color.to_1555),
+    (IMAGE_FORMAT_4444, Color.from_4444, Color.to_4444),
+])
+def test_convertor(image_format, decode, encode):
+    assert FormatConvertor.to_raw(ALL_PIXELS, image_format) == per_pixel_from(decode, ALL_PIXELS)
+    rgba = random_rgba(4096, seed=1)
+    assert FormatConvertor.from_raw(rgba, image_format) == per_pixel_to(encode, rgba)
+
+
+def test_convertor_8888():
+    rgba = random_rgba(4096, seed=2)
+    assert FormatConvertor.to_raw(FormatConvertor.from_raw(rgba, IMAGE_FORMAT_8888), IMAGE_FORMAT_8888) == rgba
+
+
+def test_trailing_bytes_ignored():
+    assert Color.from_1555_bulk(ALL_PIXELS[:7]) == Color.from_1555_bulk(ALL_PIXELS[:6])
+    assert Color.to_4444_bulk(random_rgba(3)[:11]) == Color.to_4444_bulk(random_rgba(3)[:8])